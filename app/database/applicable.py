@@ -0,0 +1,38 @@
+import pathlib
+import sqlite3
+
+from .meta import RatingPeriod, existing_ratings
+
+query_path = pathlib.Path(__file__).resolve().parent / 'applicable_rating.sql'
+
+create_query = """
+CREATE TABLE IF NOT EXISTS applicable_rating (
+    knsb_id INTEGER NOT NULL,
+    date DATE NOT NULL,
+    game_type VARCHAR NOT NULL,
+    for_opponent BOOLEAN NOT NULL,
+    rating INTEGER,
+    nv_value FLOAT,
+    source VARCHAR,
+    PRIMARY KEY (knsb_id, date, game_type, for_opponent)
+) WITHOUT ROWID;
+"""
+
+
+def refresh_applicable_rating(con: sqlite3.Connection, periods: list[RatingPeriod] | None = None) -> None:
+    """
+    Precomputes the applicable rating of every KNSB player for the given periods,
+    so the API can look it up instead of combining KNSB and FIDE ratings per request.
+    Without periods, every period in the meta file is rebuilt.
+    Run after the rating or player tables changed.
+    """
+    if periods is None:
+        periods = sorted(set(existing_ratings('knsb')) | set(existing_ratings('fide')))
+
+    con.execute(create_query)
+    insert_query = query_path.open().read()
+
+    for period in periods:
+        con.execute("DELETE FROM applicable_rating WHERE date = ?;", [period.isoformat()])
+        con.execute(insert_query, {'date': period.isoformat()})
+        con.commit()
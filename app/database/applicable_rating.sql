@@ -0,0 +1,97 @@
+-- Materialiseert calculate_applicable_rating (app/rating/domain/rules/applicable_rating.py)
+-- voor alle KNSB spelers in de periode :date. Houd deze twee in sync!
+-- Spelers zonder geldende rating krijgen een rij met rating NULL.
+INSERT INTO applicable_rating (knsb_id, date, game_type, for_opponent, rating, nv_value, source)
+WITH
+game_type (game_type) AS (VALUES ('STANDARD'), ('RAPID'), ('BLITZ')),
+for_opponent (for_opponent) AS (VALUES (0), (1)),
+player AS (
+    SELECT
+        kp.knsb_id,
+        kp.fide_id,
+        kp.fed,
+        kr.standard_rating AS knsb_standard,
+        kr.standard_games AS knsb_standard_games,
+        kr.rapid_rating AS knsb_rapid,
+        kr.rapid_games AS knsb_rapid_games,
+        kr.blitz_rating AS knsb_blitz,
+        kr.blitz_games AS knsb_blitz_games,
+        fr.standard_rating AS fide_standard,
+        fr.standard_k AS fide_standard_k,
+        fr.rapid_rating AS fide_rapid,
+        fr.rapid_k AS fide_rapid_k,
+        fr.blitz_rating AS fide_blitz,
+        fr.blitz_k AS fide_blitz_k
+    FROM knsb_player kp
+    LEFT JOIN knsb_rating kr ON kr.knsb_id = kp.knsb_id AND kr.date = :date
+    LEFT JOIN fide_rating fr ON fr.fide_id = kp.fide_id AND fr.date = :date
+    WHERE kr.knsb_id IS NOT NULL OR fr.fide_id IS NOT NULL
+),
+-- calculate_knsb_rating en calculate_fide_rating
+source AS (
+    SELECT
+        player.*,
+        game_type,
+        CASE
+            WHEN game_type = 'RAPID' AND knsb_rapid THEN 'knsb-rapid'
+            WHEN game_type = 'BLITZ' AND knsb_blitz THEN 'knsb-blitz'
+            WHEN knsb_standard AND (game_type = 'STANDARD' OR knsb_standard >= 1300) THEN 'knsb-standard'
+        END AS knsb_source,
+        CASE
+            WHEN fide_standard THEN 'fide-standard'
+            WHEN game_type = 'RAPID' AND fide_rapid THEN 'fide-rapid'
+            WHEN game_type = 'BLITZ' AND fide_blitz THEN 'fide-blitz'
+        END AS fide_source
+    FROM player
+    CROSS JOIN game_type
+),
+rated AS (
+    SELECT
+        source.*,
+        CASE knsb_source
+            WHEN 'knsb-rapid' THEN knsb_rapid
+            WHEN 'knsb-blitz' THEN knsb_blitz
+            WHEN 'knsb-standard' THEN knsb_standard
+        END AS knsb_rating,
+        CASE knsb_source
+            WHEN 'knsb-rapid' THEN knsb_rapid_games
+            WHEN 'knsb-blitz' THEN knsb_blitz_games
+            WHEN 'knsb-standard' THEN knsb_standard_games
+        END AS knsb_nv,
+        CASE fide_source
+            WHEN 'fide-standard' THEN fide_standard
+            WHEN 'fide-rapid' THEN fide_rapid
+            WHEN 'fide-blitz' THEN fide_blitz
+        END AS fide_rating,
+        CASE fide_source
+            WHEN 'fide-standard' THEN 1000.0 / fide_standard_k
+            WHEN 'fide-rapid' THEN 1000.0 / fide_rapid_k
+            WHEN 'fide-blitz' THEN 1000.0 / fide_blitz_k
+        END AS fide_nv
+    FROM source
+),
+-- calculate_applicable_rating: de KNSB rating, tenzij de speler geen KNSB rating heeft
+-- of een buitenlandse tegenstander is met een hogere FIDE rating.
+choice AS (
+    SELECT
+        rated.*,
+        for_opponent,
+        CASE
+            WHEN NOT COALESCE(fide_id, 0) THEN 0
+            WHEN knsb_source IS NULL THEN 1
+            WHEN fed = 'NED' THEN 0
+            WHEN for_opponent AND fide_source IS NOT NULL AND fide_rating > knsb_rating THEN 1
+            ELSE 0
+        END AS use_fide
+    FROM rated
+    CROSS JOIN for_opponent
+)
+SELECT
+    knsb_id,
+    :date,
+    game_type,
+    for_opponent,
+    CASE WHEN use_fide THEN fide_rating ELSE knsb_rating END,
+    CASE WHEN use_fide THEN fide_nv ELSE knsb_nv END,
+    CASE WHEN use_fide THEN fide_source ELSE knsb_source END
+FROM choice;
@@ -0,0 +1,166 @@
+"""
+Loads DataFrames into the tables declared in `app.models`, keeping their primary keys.
+"""
+import sqlite3
+import time
+from typing import Iterator
+
+import pandas as pd
+
+from app.models import Base
+from config import settings
+
+from .schema import create_indexes, create_table
+
+
+def frame_rows(df: pd.DataFrame) -> Iterator[tuple]:
+    """The rows of `df` as tuples for `executemany`, with None for missing values."""
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+
+def upsert_statement(table: str, columns: list[str], keys: list[str], keep_existing: list[str] | None = None) -> str:
+    """
+    INSERT of `columns` that updates the existing row with the same `keys` instead,
+    except for the `keep_existing` columns that already have a value.
+    """
+    keep_existing = keep_existing or []
+    assignments = ', '.join(
+        f'"{column}" = COALESCE("{table}"."{column}", excluded."{column}")' if column in keep_existing
+        else f'"{column}" = excluded."{column}"'
+        for column in columns if column not in keys
+    )
+    names = ', '.join(f'"{column}"' for column in columns)
+    values = ', '.join('?' for _ in columns)
+    conflict = f'DO UPDATE SET {assignments}' if assignments else 'DO NOTHING'
+    return (f'INSERT INTO "{table}" ({names}) VALUES ({values}) '
+            f'ON CONFLICT ({", ".join(keys)}) {conflict};')
+
+
+def _migrate_table(con: sqlite3.Connection, table: str, keep_rows: bool) -> None:
+    """
+    Recreates `table` with its declared schema when it's missing the primary key,
+    like the tables `DataFrame.to_sql` used to replace. Runs in the caller's transaction.
+    """
+    declared = Base.metadata.tables[table]
+    existing = con.execute(f'PRAGMA table_info("{table}");').fetchall()
+    if not existing:
+        create_table(con, declared)
+        return
+
+    # (cid, name, type, notnull, default, pk)
+    primary_key = [name for _, name, _, _, _, pk in sorted(existing, key=lambda column: column[5]) if pk]
+    if primary_key == [column.name for column in declared.primary_key.columns]:
+        return
+
+    print(f"Recreating {table} with its primary key...")
+    con.execute(f'ALTER TABLE "{table}" RENAME TO "{table}_old";')
+    create_table(con, declared)
+    if keep_rows:
+        columns = ', '.join(f'"{name}"' for _, name, _, _, _, _ in existing if name in declared.columns)
+        con.execute(f'INSERT OR REPLACE INTO "{table}" ({columns}) SELECT {columns} FROM "{table}_old";')
+    con.execute(f'DROP TABLE "{table}_old";')
+
+
+def load_table(con: sqlite3.Connection, table: str, df: pd.DataFrame) -> int:
+    """
+    Writes the rows of `df` (index included) to the declared `table` in one transaction,
+    so readers see either none or all of them. Rows that already exist (by primary key) are updated.
+
+    When the table has fewer rows than `df`, like a first load, the declared secondary indexes are
+    dropped during the load and built again afterwards, that's faster than updating them row by row.
+    A smaller load, like the next month of ratings, updates them instead. Returns the number of rows.
+    """
+    declared = Base.metadata.tables[table]
+    df = df.reset_index()
+    unknown = set(df.columns) - set(declared.columns.keys())
+    if unknown:
+        raise ValueError(f"Columns not in {table}: {', '.join(sorted(map(str, unknown)))}")
+
+    keys = [column.name for column in declared.primary_key.columns]
+    statement = upsert_statement(table, list(df.columns), keys)
+    start = time.perf_counter()
+
+    con.commit()
+    con.execute("BEGIN;")
+    try:
+        _migrate_table(con, table, keep_rows=True)
+        # Counts no further than len(df), so a small load stays cheap on a large table.
+        (existing,) = con.execute(f'SELECT count(*) FROM (SELECT 1 FROM "{table}" LIMIT ?);', [len(df)]).fetchone()
+        rebuild = existing < len(df)
+        if rebuild:
+            for index in declared.indexes:
+                con.execute(f'DROP INDEX IF EXISTS "{index.name}";')
+
+        chunk_size = settings.write_chunk_size
+        for offset in range(0, len(df), chunk_size):
+            con.executemany(statement, frame_rows(df.iloc[offset:offset + chunk_size]))
+
+        # The dropped indexes, and any declared after the table was made.
+        create_indexes(con, declared)
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+
+    seconds = time.perf_counter() - start
+    print(f"Loaded {len(df)} rows into {table} in {seconds:.1f} s ({len(df) / max(seconds, 1e-9):.0f} rows/s).")
+    return len(df)
+
+
+def refresh_table(con: sqlite3.Connection, table: str, df: pd.DataFrame, ignore: list[str] | None = None) -> dict[str, int]:
+    """
+    Makes `table` equal to `df` (index included) by only writing the rows that changed,
+    in one transaction. Rows are compared by primary key and a hash of the other columns,
+    except the `ignore` columns. Returns the number of inserted, updated, deleted and unchanged rows.
+    """
+    declared = Base.metadata.tables[table]
+    keys = [column.name for column in declared.primary_key.columns]
+    df = df.reset_index()
+    unknown = set(df.columns) - set(declared.columns.keys())
+    if unknown:
+        raise ValueError(f"Columns not in {table}: {', '.join(sorted(map(str, unknown)))}")
+    # Like `load_table`, the last row with a key wins.
+    df = df[~df.duplicated(keys, keep='last')].reset_index(drop=True)
+
+    compared = [column for column in df.columns if column not in keys and column not in (ignore or [])]
+    start = time.perf_counter()
+
+    con.commit()
+    con.execute("BEGIN;")
+    try:
+        _migrate_table(con, table, keep_rows=True)
+
+        # Python values from both sides, so e.g. a bool and the 0/1 sqlite returns hash the same.
+        key_names = ', '.join(f'"{key}"' for key in keys)
+        names = ', '.join(f'"{column}"' for column in compared)
+        cursor = con.execute(f'SELECT {key_names}, {names} FROM "{table}";')
+        old = {row[:len(keys)]: hash(row[len(keys):]) for row in cursor}
+
+        changed = []
+        new_keys = set()
+        counts = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+        for position, row in enumerate(frame_rows(df[keys + compared])):
+            key = row[:len(keys)]
+            new_keys.add(key)
+            if key not in old:
+                counts['inserted'] += 1
+                changed.append(position)
+            elif old[key] != hash(row[len(keys):]):
+                counts['updated'] += 1
+                changed.append(position)
+            else:
+                counts['unchanged'] += 1
+        deleted = [key for key in old if key not in new_keys]
+        counts['deleted'] = len(deleted)
+
+        conditions = ' AND '.join(f'"{key}" = ?' for key in keys)
+        con.executemany(f'DELETE FROM "{table}" WHERE {conditions};', deleted)
+        con.executemany(upsert_statement(table, list(df.columns), keys), frame_rows(df.iloc[changed]))
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+
+    seconds = time.perf_counter() - start
+    print(f"Refreshed {table} in {seconds:.1f} s: " + ', '.join(f'{count} {name}' for name, count in counts.items()) + ".")
+    return counts
@@ -0,0 +1,42 @@
+import sqlite3
+
+from config import settings
+
+
+def _execute_pragmas(dbapi_connection, pragmas: list[str]) -> None:
+    cursor = dbapi_connection.cursor()
+    for pragma in pragmas:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def read_pragmas(dbapi_connection, connection_record=None) -> None:
+    """Connect listener for the engines of the API."""
+    _execute_pragmas(dbapi_connection, [
+        "PRAGMA query_only = ON;",
+        f"PRAGMA mmap_size = {settings.sqlite_mmap_mb * 1024 * 1024};",
+        # Negative means KiB instead of pages.
+        f"PRAGMA cache_size = -{settings.sqlite_cache_mb * 1024};",
+        f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout_ms};",
+    ])
+
+
+def write_pragmas(dbapi_connection, connection_record=None) -> None:
+    """
+    Connect listener for writing connections.
+    WAL lets the API keep reading while the ingest writes.
+    """
+    _execute_pragmas(dbapi_connection, [
+        "PRAGMA journal_mode = WAL;",
+        # Safe with WAL, only the last transactions can be lost on power failure.
+        "PRAGMA synchronous = NORMAL;",
+        f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout_ms};",
+    ])
+
+
+def connect_writer(path: str | None = None) -> sqlite3.Connection:
+    """The connection the ingest writes through."""
+    con = sqlite3.connect(path or settings.database_path)
+    write_pragmas(con)
+    return con
+
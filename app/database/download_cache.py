@@ -0,0 +1,114 @@
+"""
+A local cache of the downloaded rating lists, in `settings.download_cache_dir`.
+
+Files are stored by the sha256 of their content (`objects/<hash><suffix>`),
+`index.json` maps every url to its file and the ETag and Last-Modified headers
+it was downloaded with. Cached urls are revalidated with a conditional request,
+so an unchanged list isn't downloaded again.
+"""
+import datetime
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+import threading
+from urllib.parse import urlparse
+
+import requests
+
+from config import settings
+
+_lock = threading.Lock()
+
+
+class OfflineError(Exception):
+    pass
+
+
+def cache_dir() -> pathlib.Path:
+    return pathlib.Path(settings.download_cache_dir)
+
+
+def _read_index() -> dict[str, dict]:
+    index_file = cache_dir() / 'index.json'
+    if not index_file.exists():
+        return {}
+    with index_file.open(encoding='utf8') as f:
+        return json.load(f)
+
+
+def _write_index(index: dict[str, dict]) -> None:
+    index_file = cache_dir() / 'index.json'
+    tmp_file = index_file.with_suffix('.tmp')
+    with tmp_file.open('w', encoding='utf8') as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_file, index_file)
+
+
+def _store(response: requests.Response, suffix: str) -> str:
+    """Writes the body of `response` to the objects directory, returns its name."""
+    objects = cache_dir() / 'objects'
+    objects.mkdir(parents=True, exist_ok=True)
+
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=objects, delete=False) as f:
+        for block in response.iter_content(2**20):
+            digest.update(block)
+            f.write(block)
+
+    name = digest.hexdigest() + suffix
+    os.replace(f.name, objects / name)
+    return name
+
+
+def cached_path(url: str, offline: bool = False) -> pathlib.Path:
+    """
+    Returns the path of the cached copy of `url`, downloading it first if needed.
+    With `offline` only the cache is used.
+    """
+    with _lock:
+        entry = _read_index().get(url)
+
+    if offline:
+        if entry is None:
+            raise OfflineError(f"{url} isn't cached")
+        path = cache_dir() / 'objects' / entry['object']
+        if not path.exists():
+            raise OfflineError(f"The cached file of {url} is missing: {path}")
+        return path
+
+    headers = {}
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry and entry.get('last-modified'):
+        headers['If-Modified-Since'] = entry['last-modified']
+
+    with requests.get(url, headers=headers, stream=True) as response:
+        response.raise_for_status()
+        if entry and response.status_code == 304:
+            return cache_dir() / 'objects' / entry['object']
+
+        name = _store(response, pathlib.PurePosixPath(urlparse(url).path).suffix)
+        new_entry = {
+            'object': name,
+            'etag': response.headers.get('ETag'),
+            'last-modified': response.headers.get('Last-Modified'),
+            'downloaded-at': datetime.datetime.now().isoformat(timespec='seconds'),
+        }
+
+    with _lock:
+        index = _read_index()
+        old = index.get(url)
+        index[url] = new_entry
+        _write_index(index)
+
+        # Remove the previous content, unless another url has the same.
+        if old and old['object'] != name and all(e['object'] != old['object'] for e in index.values()):
+            (cache_dir() / 'objects' / old['object']).unlink(missing_ok=True)
+
+    return cache_dir() / 'objects' / name
+
+
+def fetch(url: str, offline: bool = False) -> bytes:
+    return cached_path(url, offline).read_bytes()
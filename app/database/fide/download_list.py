@@ -1,11 +1,20 @@
+import io
+import multiprocessing
+import os
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor,
+                                as_completed)
+from typing import BinaryIO, Iterator
+
 import pandas as pd
 
+from ..download_cache import fetch
 from ..meta import RatingPeriod
+from .fwf import iter_fwf, open_zip, read_fwf, read_zip
 
-Int = pd.Int64Dtype()
+GAME_TYPES = ['standard', 'rapid', 'blitz']
 
 
-def read_legacy_format_players() -> pd.DataFrame:
+def read_legacy_format_players(offline: bool = False) -> pd.DataFrame:
     """
     Reads the most recent FIDE rating list in (apperently) legacy format.
     This means the standard, blitz and rapid ratings are combined,
@@ -14,7 +23,9 @@ def read_legacy_format_players() -> pd.DataFrame:
     # Apparently FIDE does downloads over http.
     url = "http://ratings.fide.com/download/players_list_legacy.zip"
 
-    df = pd.read_fwf(url, compression='zip', na_values=['', 0])
+    df = read_fwf(read_zip(fetch(url, offline)),
+                  int_columns=['ID Number', 'B-day'],
+                  str_columns=['Name', 'Fed', 'Sex', 'Tit', 'WTit', 'OTit', 'Flag'])
     players = pd.DataFrame(dict(
         fide_id=df['ID Number'],
         name=df['Name'],
@@ -23,37 +34,56 @@ def read_legacy_format_players() -> pd.DataFrame:
         title=df['Tit'],
         woman_title=df['WTit'],
         other_titles=df['OTit'],
-        birthyear=df['B-day'].astype(Int),
+        birthyear=df['B-day'],
         active=~df['Flag'].str.contains('i', regex=False, na=False)
     ))
     players.set_index('fide_id', inplace=True)
     return players
 
 
-def read_rating_zip(url: str, period: RatingPeriod) -> pd.DataFrame:
+# Since the file will be fwf (fixed width format) these are the widths it uses.
+# They can't always be inferred from the header.
+RATING_WIDTHS = [15, 61, 4, 4, 5, 5, 15, 4, 6, 4, 3, 6, 5]
+
+
+def rating_list_url(game_type: str, period: RatingPeriod) -> str:
+    return f"http://ratings.fide.com/download/{game_type}_{period.as_date().strftime('%b%y').lower()}frl.zip"
+
+
+def iter_rating_zip(file: str | os.PathLike | BinaryIO, period: RatingPeriod) -> Iterator[pd.DataFrame]:
+    """Reads a FIDE rating list (a zip) in chunks, see `read_rating_zip`."""
+    rating_column = period.as_date().strftime("%b%y").upper()
+
+    with open_zip(file) as stream:
+        chunks = iter_fwf(stream,
+                          int_columns=['ID Number', rating_column, 'Gms', 'K'],
+                          str_columns=['Tit', 'WTit', 'OTit', 'Flag'],
+                          widths=RATING_WIDTHS)
+        for df in chunks:
+            ratings = pd.DataFrame(dict(
+                fide_id=df['ID Number'],
+                date=period.isoformat(),
+                title=df['Tit'],
+                woman_title=df['WTit'],
+                other_titles=df['OTit'],
+                rating=df[rating_column],
+                games=df['Gms'],
+                k=df['K'],
+                active=~df['Flag'].str.contains('i', regex=False, na=False)
+            ))
+            ratings.set_index('fide_id', inplace=True)
+            yield ratings
+
+
+def read_rating_zip(source: str | bytes, period: RatingPeriod, offline: bool = False) -> pd.DataFrame:
     """
     Reads a FIDE rating list from fwf (fixed width format).
+    `source` is the url of the zip or its downloaded content.
     """
-    # Since the file will be fwf (fixed width format) these are the widths it uses.
-    # Pandas doesn't always recognize these properly.
-    widths = [15, 61, 4, 4, 5, 5, 15, 4, 6, 4, 3, 6, 5]
+    if isinstance(source, str):
+        source = fetch(source, offline)
 
-    rating_column = period.as_date().strftime("%b%y").upper()
-
-    df = pd.read_fwf(url, compression='zip', na_values=['', 0], widths=widths)
-    ratings = pd.DataFrame(dict(
-        fide_id=df['ID Number'],
-        date=period.isoformat(),
-        title=df['Tit'],
-        woman_title=df['WTit'],
-        other_titles=df['OTit'],
-        rating=df[rating_column].astype(Int),
-        games=df['Gms'].astype(Int),
-        k=df['K'].astype(Int),
-        active=~df['Flag'].str.contains('i', regex=False, na=False)
-    ))
-    ratings.set_index('fide_id', inplace=True)
-    return ratings
+    return pd.concat(iter_rating_zip(io.BytesIO(source), period))
 
 
 def combine_ratings(standard: pd.DataFrame, rapid: pd.DataFrame, blitz: pd.DataFrame) -> pd.DataFrame:
@@ -64,11 +94,26 @@ def combine_ratings(standard: pd.DataFrame, rapid: pd.DataFrame, blitz: pd.DataF
     return sdf.combine_first(rdf).combine_first(bdf)
 
 
-def download_ratings(period: RatingPeriod) -> pd.DataFrame:
-    url = "http://ratings.fide.com/download/{}_" + period.as_date().strftime("%b%y").lower() + "frl.zip"
+def download_ratings(period: RatingPeriod, offline: bool = False) -> pd.DataFrame:
+    """
+    Downloads the standard, rapid and blitz lists at the same time.
+    Each list is parsed in a separate process (one per core) as soon as it's downloaded.
+    """
+    workers = min(len(GAME_TYPES), os.cpu_count() or 1)
+    if workers > 1:
+        # Spawn, forking while the download threads run isn't safe.
+        parsers = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+    else:
+        # With one core a process only adds the cost of pickling the result.
+        parsers = ThreadPoolExecutor(1)
+
+    with ThreadPoolExecutor(len(GAME_TYPES)) as threads, parsers:
+        downloads = {threads.submit(fetch, rating_list_url(game_type, period), offline): game_type for game_type in GAME_TYPES}
+
+        parsing = {}
+        for done in as_completed(downloads):
+            parsing[downloads[done]] = parsers.submit(read_rating_zip, done.result(), period)
 
-    standard_df = read_rating_zip(url.format("standard"), period)
-    rapid_df = read_rating_zip(url.format("rapid"), period)
-    blitz_df = read_rating_zip(url.format("blitz"), period)
+        ratings = {game_type: future.result() for game_type, future in parsing.items()}
 
-    return combine_ratings(standard_df, rapid_df, blitz_df)
+    return combine_ratings(ratings['standard'], ratings['rapid'], ratings['blitz'])
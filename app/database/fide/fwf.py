@@ -0,0 +1,163 @@
+"""
+A parser for the fixed width rating lists of FIDE, replacing `pandas.read_fwf`.
+
+The file is read in blocks of complete lines. Each block becomes one numpy array of
+character codes, and every column is gathered from it with one row per line, using line
+starts found with numpy too, so no Python object is created per line. Integer columns are
+computed from the digits directly. ASCII blocks (nearly all of them) are sliced as bytes,
+other blocks as unicode code points.
+"""
+import io
+import os
+import re
+import zipfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+
+import numpy as np
+import pandas as pd
+
+# (name, start, stop), stop is None for the last column of a header.
+ColumnSpec = tuple[str, int, int | None]
+
+# Header names are separated by a single space, except this one.
+HEADER_NAME = re.compile(r'ID Number|\S+')
+
+
+def read_zip(content: bytes) -> bytes:
+    """Returns the (only) file in a zip."""
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        return archive.read(archive.namelist()[0])
+
+
+@contextmanager
+def open_zip(file: str | os.PathLike | BinaryIO) -> Iterator[BinaryIO]:
+    """Opens the (only) file in a zip for streaming."""
+    with zipfile.ZipFile(file) as archive, archive.open(archive.namelist()[0]) as stream:
+        yield stream
+
+
+def header_colspecs(header: str) -> list[ColumnSpec]:
+    """Infers the columns from the positions of the names in the header."""
+    matches = list(HEADER_NAME.finditer(header))
+    stops = [m.start() for m in matches[1:]] + [None]
+    return [(m.group(), m.start(), stop) for m, stop in zip(matches, stops)]
+
+
+def width_colspecs(header: str, widths: list[int]) -> list[ColumnSpec]:
+    """Columns with known widths, named after the header."""
+    bounds = np.cumsum([0] + widths)
+    return [(header[start:stop].strip(), int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def to_codes(data: bytes) -> np.ndarray:
+    if data.isascii():
+        return np.frombuffer(data, dtype=np.uint8)
+    return np.frombuffer(data.decode('utf8').encode('utf-32-le'), dtype=np.uint32)
+
+
+def line_bounds(codes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Start and end (exclusive, without \\r\\n) of every non-empty line."""
+    ends = np.flatnonzero(codes == ord('\n'))
+    if codes.size and codes[-1] != ord('\n'):
+        ends = np.append(ends, codes.size)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    ends = ends - ((ends > starts) & (codes[np.maximum(ends - 1, 0)] == ord('\r')))
+
+    non_empty = ends > starts
+    return starts[non_empty], ends[non_empty]
+
+
+def column_codes(codes: np.ndarray, starts: np.ndarray, ends: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """The block of character codes of one column, padded with 0 where a line is shorter."""
+    positions = starts[:, None] + np.arange(start, stop)
+    inside = positions < ends[:, None]
+    return np.where(inside, codes[np.minimum(positions, codes.size - 1)], 0).astype(codes.dtype)
+
+
+def parse_int(block: np.ndarray) -> pd.arrays.IntegerArray:
+    """
+    Parses a block of character codes to integers.
+    Blank and 0 become NA, like `na_values=['', 0]` did for read_fwf.
+    """
+    is_digit = (block >= ord('0')) & (block <= ord('9'))
+    values = np.zeros(len(block), dtype=np.int64)
+    for position in range(block.shape[1]):
+        digit = is_digit[:, position]
+        values = np.where(digit, values * 10 + block[:, position] - ord('0'), values)
+
+    return pd.arrays.IntegerArray(values, ~is_digit.any(axis=1) | (values == 0))
+
+
+def parse_str(block: np.ndarray) -> pd.Series:
+    """Parses a block of character codes to stripped strings, blank becomes NaN."""
+    kind = 'S' if block.dtype == np.uint8 else 'U'
+    strings = np.strings.strip(np.ascontiguousarray(block).view(f'{kind}{block.shape[1]}').ravel())
+    return pd.Series(strings.astype(str), dtype='str').replace('', np.nan)
+
+
+def parse_chunk(
+    data: bytes,
+    colspecs: list[ColumnSpec],
+    int_columns: list[str],
+    str_columns: list[str]
+) -> pd.DataFrame | None:
+    """Parses complete lines (without header). Returns None if there are none."""
+    codes = to_codes(data)
+    starts, ends = line_bounds(codes)
+    if not starts.size:
+        return None
+
+    longest = int((ends - starts).max())
+    columns = {}
+    for name, start, stop in colspecs:
+        if name not in int_columns and name not in str_columns:
+            continue
+        block = column_codes(codes, starts, ends, start, stop or max(longest, start))
+        columns[name] = parse_int(block) if name in int_columns else parse_str(block)
+    return pd.DataFrame(columns)
+
+
+def iter_fwf(
+    stream: BinaryIO,
+    int_columns: list[str],
+    str_columns: list[str],
+    widths: list[int] | None = None,
+    chunk_bytes: int = 16 * 2**20
+) -> Iterator[pd.DataFrame]:
+    """
+    Parses the given columns of a fixed width file (utf8) with a header line,
+    about `chunk_bytes` at a time. Without `widths`, the columns are inferred from the header.
+    """
+    header = stream.readline().decode('utf8').rstrip('\r\n')
+    colspecs = width_colspecs(header, widths) if widths else header_colspecs(header)
+    missing = set(int_columns + str_columns) - {name for name, _, _ in colspecs}
+    if missing:
+        raise ValueError(f"Columns not in header: {', '.join(sorted(missing))}")
+
+    rest = b''
+    while block := stream.read(chunk_bytes):
+        data = rest + block
+        # Only complete lines, the rest goes with the next block.
+        cut = data.rfind(b'\n') + 1
+        data, rest = data[:cut], data[cut:]
+
+        df = parse_chunk(data, colspecs, int_columns, str_columns)
+        if df is not None:
+            yield df
+
+    df = parse_chunk(rest, colspecs, int_columns, str_columns)
+    if df is not None:
+        yield df
+
+
+def read_fwf(
+    data: bytes,
+    int_columns: list[str],
+    str_columns: list[str],
+    widths: list[int] | None = None
+) -> pd.DataFrame:
+    chunks = list(iter_fwf(io.BytesIO(data), int_columns, str_columns, widths))
+    if not chunks:
+        raise ValueError("No rows")
+    return pd.concat(chunks, ignore_index=True)
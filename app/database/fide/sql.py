@@ -1,24 +1,35 @@
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 
 from dateutil.rrule import MONTHLY, rrule
 
-from ..meta import (existing_ratings, remove_rating_meta, write_player_meta,
-                    write_rating_meta, RatingPeriod, player_is_to_date)
-from .download_list import download_ratings, read_legacy_format_players
+from config import settings
 
+from ..bulk import load_table, refresh_table
+from ..download_cache import cached_path
+from ..meta import (existing_ratings, rating_stats, remove_rating_meta,
+                    write_player_meta, write_rating_meta, write_rating_stats,
+                    RatingPeriod, player_is_to_date)
+from ..search import create_player_search
+from ..streaming import prefetch, upsert
+from .download_list import (GAME_TYPES, download_ratings, iter_rating_zip,
+                            rating_list_url, read_legacy_format_players)
 
-def refresh_fide_player(con: sqlite3.Connection, force_refresh: bool = False) -> None:
+
+def refresh_fide_player(con: sqlite3.Connection, force_refresh: bool = False, offline: bool = False) -> None:
     """
-    Refreshes and replaces the `fide_player` table.
+    Refreshes the `fide_player` table, only the players that changed are written.
     Run once a month.
     """
     if player_is_to_date('fide') and not force_refresh:
         return
 
-    df = read_legacy_format_players()
-    df.to_sql('fide_player', con, if_exists='replace')
+    df = read_legacy_format_players(offline)
+    changes = refresh_table(con, 'fide_player', df)
+    # Normally the triggers kept it up to date, unless the table was recreated.
+    create_player_search(con)
     # Add list information to meta file.
-    write_player_meta(df, 'fide')
+    write_player_meta(df, 'fide', {'changes': changes})
 
 
 def delete_player_rating(con: sqlite3.Connection, period: RatingPeriod) -> int:
@@ -34,10 +45,37 @@ def delete_player_rating(con: sqlite3.Connection, period: RatingPeriod) -> int:
     return count
 
 
+def stream_fide_rating(con: sqlite3.Connection, period: RatingPeriod, offline: bool = False) -> None:
+    """
+    Inserts the rating lists of `period` with memory use independent of the list size.
+    The lists are downloaded to the download cache, then parsed in a separate thread and
+    inserted chunk by chunk, each chunk in its own transaction.
+    Gives the same rows as `download_ratings`.
+    """
+    with ThreadPoolExecutor(len(GAME_TYPES)) as threads:
+        downloads = {game_type: threads.submit(cached_path, rating_list_url(game_type, period), offline)
+                     for game_type in GAME_TYPES}
+
+        def chunks():
+            # Standard first: like in `combine_ratings`, its titles and active flag come first.
+            for game_type in GAME_TYPES:
+                for df in iter_rating_zip(downloads[game_type].result(), period):
+                    yield game_type, df
+
+        for game_type, df in prefetch(chunks(), settings.stream_queue_size):
+            df = df.rename(columns={'rating': f'{game_type}_rating', 'games': f'{game_type}_games', 'k': f'{game_type}_k'})
+            upsert(con, 'fide_rating', df, keys=['fide_id', 'date'],
+                   keep_existing=['title', 'woman_title', 'other_titles', 'active'])
+
+    write_rating_stats(rating_stats(con, period, 'fide'), period, 'fide')
+
+
 def fill_fide_rating(
     con: sqlite3.Connection,
     start_period: RatingPeriod | None = None,
-    force_refresh: bool = False
+    force_refresh: bool = False,
+    stream: bool = False,
+    offline: bool = False
 ) -> None:
     """
     Fills the `fide_rating` table.
@@ -67,14 +105,22 @@ def fill_fide_rating(
             delete_player_rating(con, period)
 
         print(f"Starting download for {period}.")
-        ratings = download_ratings(period)
-        print("Download finished. Inserting to database.")
-        ratings.to_sql('fide_rating', con, if_exists='append')
-        write_rating_meta(ratings, period, 'fide')
+        if stream:
+            stream_fide_rating(con, period, offline)
+        else:
+            ratings = download_ratings(period, offline)
+            print("Download finished. Inserting to database.")
+            load_table(con, 'fide_rating', ratings)
+            write_rating_meta(ratings, period, 'fide')
         print("Done")
 
 
-def update_fide_rating(con: sqlite3.Connection, force_refresh: bool = False) -> None:
+def update_fide_rating(
+    con: sqlite3.Connection,
+    force_refresh: bool = False,
+    stream: bool = False,
+    offline: bool = False
+) -> None:
     """
     Updates the `fide_player` table. Adds to any existing table.
     Run once a month.
@@ -85,6 +131,10 @@ def update_fide_rating(con: sqlite3.Connection, force_refresh: bool = False) ->
             return
         delete_player_rating(con, current_period)
 
-    ratings = download_ratings(current_period)
-    ratings.to_sql('fide_rating', con, if_exists='append')
+    if stream:
+        stream_fide_rating(con, current_period, offline)
+        return
+
+    ratings = download_ratings(current_period, offline)
+    load_table(con, 'fide_rating', ratings)
     write_rating_meta(ratings, current_period, 'fide')
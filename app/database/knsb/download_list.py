@@ -8,20 +8,23 @@ Instead, the rapid and blitz ratings were introduced.
 """
 
 import datetime
+from typing import Iterator
 
 import pandas as pd
-import requests
 from bs4 import BeautifulSoup
 
+from ..download_cache import cached_path, fetch
 from ..meta import RatingPeriod
 
 Int = pd.Int64Dtype()
 
+SEX_VALUES = {'sex': {'w': 'V', pd.NA: 'M'}}
+
 MONTHS = {'januari': 1, 'februari': 2, 'maart': 3, 'april': 4, 'mei': 5, 'juni': 6,
           'juli': 7, 'augustus': 8, 'september': 9, 'oktober': 10, 'november': 11, 'december': 12}
 
 
-def get_download_urls() -> dict[RatingPeriod, dict[str, str]]:
+def get_download_urls(offline: bool = False) -> dict[RatingPeriod, dict[str, str]]:
     """Scrapes the urls for the download lists from the schaakbond website.
     I would like to just infer the urls from the date, since they mostly look like
     https://schaakbond.nl/wp-content/uploads/{year}/{month}/{year}-{month}-{rating_type}.zip
@@ -36,9 +39,7 @@ def get_download_urls() -> dict[RatingPeriod, dict[str, str]]:
     For new lists, it's `KLASSIEK`, `RAPID`, and `SNEL`.
     """
     url = "https://schaakbond.nl/rating/downloadlijsten/"
-    response = requests.get(url)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.content, 'html.parser')
+    soup = BeautifulSoup(fetch(url, offline), 'html.parser')
 
     archive_list = soup.find('div', attrs={'class': 'avia_textblock'}).find_all('ul')[1]  # type: ignore
     list_items = archive_list.find_all('li')
@@ -61,14 +62,26 @@ def get_download_urls() -> dict[RatingPeriod, dict[str, str]]:
     return base_urls
 
 
-def read_rating_zip(url: str) -> pd.DataFrame:
-    """Reads a rating list for a specific date and rating type. Fragile, don't touch.
-    """
+def _read_rating_csv(url: str, chunk_size: int | None = None, offline: bool = False):
     names = ['knsb_id', 'name', 'title', 'fed', 'rating', 'games', 'birthyear', 'sex']
-    
-    return pd.read_csv(url, skiprows=1, encoding='latin1', sep=';', index_col='knsb_id',
+
+    # The cached file keeps the .zip suffix of the url, pandas infers the compression from it.
+    return pd.read_csv(cached_path(url, offline), skiprows=1, encoding='latin1', sep=';', index_col='knsb_id',
                        names=names, dtype={'rating': Int, 'games': Int, 'birthyear': Int},
-                       na_values=["#N/B", ""]).replace({'sex': {'w': 'V', pd.NA: 'M'}})
+                       na_values=["#N/B", ""], chunksize=chunk_size)
+
+
+def read_rating_zip(url: str, offline: bool = False) -> pd.DataFrame:
+    """Reads a rating list for a specific date and rating type. Fragile, don't touch.
+    """
+    return _read_rating_csv(url, offline=offline).replace(SEX_VALUES)
+
+
+def iter_rating_zip(url: str, chunk_size: int, offline: bool = False) -> Iterator[pd.DataFrame]:
+    """`read_rating_zip` in chunks of `chunk_size` rows."""
+    with _read_rating_csv(url, chunk_size, offline) as reader:
+        for df in reader:
+            yield df.replace(SEX_VALUES)
 
 
 def combine_rating_old(rating_lists: dict[str, pd.DataFrame]) -> pd.DataFrame:
@@ -136,28 +149,32 @@ def combine_rating(rating_lists: dict[str, pd.DataFrame], period: RatingPeriod)
     return df
 
 
-def load_knsb_rating(period: RatingPeriod, date_urls: dict[str, str] | None = None) -> pd.DataFrame | None:
+def load_knsb_rating(
+    period: RatingPeriod,
+    date_urls: dict[str, str] | None = None,
+    offline: bool = False
+) -> pd.DataFrame | None:
     """
     Loads the full rating list for a specific date. Note that this involves getting (scraping)
     the entire list of download urls. For loading all ratings lists, see `load_full_rating_archive`.
     """
     if not date_urls:
-        urls = get_download_urls()
+        urls = get_download_urls(offline)
         date_urls = urls.get(period, None)
         if date_urls is None:
             return
     
-    rating_lists = {rating_type: read_rating_zip(url) for rating_type, url in date_urls.items()}
+    rating_lists = {rating_type: read_rating_zip(url, offline) for rating_type, url in date_urls.items()}
     return combine_rating(rating_lists, period)
 
 
-def load_knsb_player(period: RatingPeriod) -> pd.DataFrame | None:
-    urls = get_download_urls()
+def load_knsb_player(period: RatingPeriod, offline: bool = False) -> pd.DataFrame | None:
+    urls = get_download_urls(offline)
     date_urls = urls.get(period, None)
     if date_urls is None:
         return
         
-    df = read_rating_zip(date_urls["KLASSIEK"])[
+    df = read_rating_zip(date_urls["KLASSIEK"], offline)[
         ['name', 'title', 'fed', 'birthyear', 'sex']
     ]
     df['fide_id'] = pd.Series(pd.NA, dtype=Int)
@@ -0,0 +1,97 @@
+"""
+Finds the FIDE id of KNSB players by joining the player tables on (name, fed, birthyear, sex).
+
+A match is only assigned when it's unique: no other FIDE player has the key, no other KNSB
+player has the key, and the FIDE player isn't matched already. The players that don't match
+exactly get a second chance with normalized names (see `normalize_name`).
+"""
+import sqlite3
+
+import pandas as pd
+
+from ..normalize import normalize_name
+
+KEY = ['name', 'fed', 'birthyear', 'sex']
+
+
+def _unique_keys(df: pd.DataFrame) -> pd.DataFrame:
+    return df[~df.duplicated(KEY, keep=False)]
+
+
+def match_tier(knsb: pd.DataFrame, fide: pd.DataFrame, taken: set[int]) -> tuple[pd.Series, pd.Index]:
+    """
+    Matches on `KEY` with one hash join. Returns the FIDE ids by knsb_id, and the knsb_ids
+    of the players with a FIDE player with their key that isn't a unique match.
+    """
+    candidates = knsb.merge(fide, on=KEY, how='inner')
+    matches = _unique_keys(knsb).merge(_unique_keys(fide), on=KEY, how='inner')
+    matches = matches[~matches['fide_id'].isin(taken)]
+    ambiguous = pd.Index(candidates['knsb_id'].unique()).difference(matches['knsb_id'])
+    return matches.set_index('knsb_id')['fide_id'], ambiguous
+
+
+def match_fide_ids(knsb: pd.DataFrame, fide: pd.DataFrame, normalized: bool = True) -> tuple[pd.Series, dict[str, int]]:
+    """
+    `knsb` has the columns knsb_id and `KEY`, `fide` has fide_id and `KEY`.
+    Returns the FIDE id by knsb_id of the matched players, and per tier the number of matches
+    and of players with a candidate that isn't unique. The players that are ambiguous exactly
+    can still match normalized, `unmatched` counts the players without any match in the end.
+    """
+    players = len(knsb)
+    # Like the SQL comparison, a missing value never matches.
+    knsb = knsb.dropna(subset=KEY)
+    fide = fide.dropna(subset=KEY)
+
+    matches, ambiguous = match_tier(knsb, fide, set())
+    stats = {'exact': len(matches), 'ambiguous_exact': len(ambiguous)}
+
+    if normalized:
+        rest = knsb[~knsb['knsb_id'].isin(matches.index)]
+        # Only FIDE players that can share a key with one of the rest need their name normalized.
+        others = KEY[1:]
+        fide = fide.merge(rest[others].drop_duplicates(), on=others, how='inner')
+        normalized_matches, ambiguous_normalized = match_tier(
+            rest.assign(name=rest['name'].map(normalize_name)),
+            fide.assign(name=fide['name'].map(normalize_name)),
+            set(matches)
+        )
+        stats['normalized'] = len(normalized_matches)
+        stats['ambiguous_normalized'] = len(ambiguous_normalized)
+        matches = pd.concat([matches, normalized_matches])
+        ambiguous = ambiguous.union(ambiguous_normalized)
+
+    stats['ambiguous'] = len(ambiguous.difference(matches.index))
+    stats['unmatched'] = players - len(matches) - stats['ambiguous']
+    return matches, stats
+
+
+def fill_player_fide_id(con: sqlite3.Connection, normalized: bool = True) -> dict[str, int]:
+    """
+    Sets `knsb_player.fide_id` for every player: the matched FIDE id, or NULL.
+    Only the players whose FIDE id changes are written. Returns the number of matches per tier.
+    """
+    knsb = pd.read_sql("SELECT knsb_id, fide_id AS old_fide_id, name, fed, birthyear, sex FROM knsb_player;", con)
+    # Only FIDE players that can share a key with a KNSB player matter for the uniqueness.
+    fide = pd.read_sql("""
+        SELECT fide_id, name, fed, birthyear, sex FROM fide_player
+        WHERE (fed, birthyear, sex) IN (SELECT fed, birthyear, sex FROM knsb_player);
+    """, con)
+
+    matches, stats = match_fide_ids(knsb.drop(columns='old_fide_id'), fide, normalized)
+
+    old = knsb.set_index('knsb_id')['old_fide_id'].astype('Int64')
+    new = matches.reindex(old.index).astype('Int64')
+    changed = new[new.fillna(0) != old.fillna(0)]
+
+    con.executemany(
+        "UPDATE knsb_player SET fide_id = ? WHERE knsb_id = ?;",
+        ((None if pd.isna(fide_id) else int(fide_id), int(knsb_id)) for knsb_id, fide_id in changed.items())
+    )
+    # Left behind by the correlated subquery this replaces.
+    con.execute("DROP INDEX IF EXISTS idx_fide_match;")
+    con.execute("DROP INDEX IF EXISTS idx_knsb_match;")
+    con.commit()
+
+    print("Matched FIDE ids: " + ', '.join(f'{count} {tier}' for tier, count in stats.items())
+          + f", {len(changed)} changed.")
+    return stats
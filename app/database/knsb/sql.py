@@ -1,35 +1,39 @@
-import pathlib
 import sqlite3
 
-from ..meta import (RatingPeriod, existing_ratings, player_is_to_date,
-                    remove_rating_meta, write_player_meta, write_rating_meta)
-from .download_list import (get_download_urls, load_knsb_player,
-                            load_knsb_rating)
-
-query_path = pathlib.Path(__file__).resolve().parent / 'fide_id_query.sql'
+import pandas as pd
 
+from config import settings
 
-def fill_player_fide_id(con: sqlite3.Connection) -> None:
-    con.executescript(query_path.open().read())
-    con.commit()
+from ..bulk import load_table, refresh_table
+from ..meta import (RatingPeriod, existing_ratings, player_is_to_date,
+                    rating_stats, remove_rating_meta, write_player_meta,
+                    write_rating_meta, write_rating_stats)
+from ..search import create_player_search
+from ..streaming import prefetch, upsert
+from .download_list import (get_download_urls, iter_rating_zip,
+                            load_knsb_player, load_knsb_rating)
+from .match import fill_player_fide_id
 
 
-def refresh_knsb_player(con: sqlite3.Connection, force_refresh: bool = False) -> None:
+def refresh_knsb_player(con: sqlite3.Connection, force_refresh: bool = False, offline: bool = False) -> None:
     """
-    Refreshes and replaces the `knsb_player` table.
+    Refreshes the `knsb_player` table, only the players that changed are written.
     If the table is already up to date, it can be forced anyway using force_refresh.
     Run once a month.
     """
     if player_is_to_date('knsb') and not force_refresh:
         return
 
-    df = load_knsb_player(RatingPeriod.current())
+    df = load_knsb_player(RatingPeriod.current(), offline)
     if df is None:
         raise Exception("Uhmm not found")
-    
-    df.to_sql('knsb_player', con, if_exists='replace')
-    fill_player_fide_id(con)
-    write_player_meta(df, 'knsb')
+
+    # fide_id isn't in the list, changed players get it back from `fill_player_fide_id`.
+    changes = refresh_table(con, 'knsb_player', df, ignore=['fide_id'])
+    # Normally the triggers kept it up to date, unless the table was recreated.
+    create_player_search(con)
+    matches = fill_player_fide_id(con)
+    write_player_meta(df, 'knsb', {'changes': changes, 'fide-matches': matches})
 
 
 def delete_player_rating(con: sqlite3.Connection, period: RatingPeriod) -> int:
@@ -45,10 +49,52 @@ def delete_player_rating(con: sqlite3.Connection, period: RatingPeriod) -> int:
     return count
 
 
+def stream_knsb_rating(
+    con: sqlite3.Connection,
+    period: RatingPeriod,
+    date_urls: dict[str, str] | None = None,
+    offline: bool = False
+) -> bool:
+    """
+    Inserts the rating lists of `period` chunk by chunk, each chunk in its own transaction.
+    Gives the same rows as `load_knsb_rating`. Returns False if there are no lists for `period`.
+    """
+    if not date_urls:
+        date_urls = get_download_urls(offline).get(period, None)
+        if date_urls is None:
+            return False
+
+    # (rating type, game type, whether only players on the first list get a row)
+    if period <= RatingPeriod(2024, 9):
+        lists = [('KNSB', 'standard', False), ('JEUGD', 'junior', False)]
+    else:
+        lists = [('KLASSIEK', 'standard', False), ('RAPID', 'rapid', True), ('SNEL', 'blitz', True)]
+
+    def chunks():
+        for rating_type, game_type, update_only in lists:
+            for df in iter_rating_zip(date_urls[rating_type], settings.write_chunk_size, offline):
+                yield game_type, update_only, df
+
+    for game_type, update_only, df in prefetch(chunks(), settings.stream_queue_size):
+        ratings = pd.DataFrame({
+            'date': period.isoformat(),
+            f'{game_type}_rating': df['rating'],
+            f'{game_type}_games': df['games'],
+        }, index=df.index)
+        if game_type == 'standard':
+            ratings['title'] = df['title']
+        upsert(con, 'knsb_rating', ratings, keys=['knsb_id', 'date'], update_only=update_only)
+
+    write_rating_stats(rating_stats(con, period, 'knsb'), period, 'knsb')
+    return True
+
+
 def fill_knsb_rating(
     con: sqlite3.Connection,
     start_period: RatingPeriod | None = None,
-    force_refresh: bool = False
+    force_refresh: bool = False,
+    stream: bool = False,
+    offline: bool = False
 ) -> None:
     """
     Fills the `knsb_rating` table.
@@ -58,7 +104,7 @@ def fill_knsb_rating(
     we can start from `start_date` and incrementally add lists when we feel like it. 
     """
 
-    urls = get_download_urls()
+    urls = get_download_urls(offline)
     skip_dates = existing_ratings('knsb')
 
     for period, date_urls in urls.items():
@@ -71,15 +117,24 @@ def fill_knsb_rating(
             else:
                 continue
 
-        df = load_knsb_rating(period, date_urls)
+        if stream:
+            stream_knsb_rating(con, period, date_urls, offline)
+            continue
+
+        df = load_knsb_rating(period, date_urls, offline)
         if df is None:
             continue
 
-        df.to_sql('knsb_rating', con, if_exists='append')
+        load_table(con, 'knsb_rating', df)
         write_rating_meta(df, period, 'knsb')
 
 
-def update_knsb_rating(con: sqlite3.Connection, force_refresh: bool = False) -> None:
+def update_knsb_rating(
+    con: sqlite3.Connection,
+    force_refresh: bool = False,
+    stream: bool = False,
+    offline: bool = False
+) -> None:
     """
     Updates the `knsb_player` table. Adds to any existing table.
     Run once a month.
@@ -90,9 +145,13 @@ def update_knsb_rating(con: sqlite3.Connection, force_refresh: bool = False) ->
             return
         delete_player_rating(con, today)
 
-    df = load_knsb_rating(today)
+    if stream:
+        stream_knsb_rating(con, today, offline=offline)
+        return
+
+    df = load_knsb_rating(today, offline=offline)
     if df is None:
         return
 
-    df.to_sql('knsb_rating', con, if_exists='append')
+    load_table(con, 'knsb_rating', df)
     write_rating_meta(df, today, 'knsb')
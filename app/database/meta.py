@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import datetime
 import json
+import os
 import pathlib
+import sqlite3
 from contextlib import contextmanager
 from dataclasses import dataclass
 
@@ -51,15 +53,32 @@ def open_meta(mode: str = 'r'):
         yield meta
     finally:
         if mode == 'w':
-            with meta_file.open('w', encoding='utf8') as f:
+            # Write to a temporary file first, so readers never see a half written file.
+            tmp_file = meta_file.with_suffix('.tmp')
+            with tmp_file.open('w', encoding='utf8') as f:
                 json.dump(meta, f, indent=2)
+            os.replace(tmp_file, meta_file)
+
+
+@contextmanager
+def redirect_meta(path: pathlib.Path):
+    """Reads and writes the meta file at `path` instead, e.g. the one of a shadow database."""
+    global meta_file
+
+    original = meta_file
+    meta_file = path
+    try:
+        yield
+    finally:
+        meta_file = original
 
 
 def today_iso() -> str:
     return datetime.date.today().isoformat()
 
 
-def write_player_meta(df: pd.DataFrame, source: str) -> None:
+def write_player_meta(df: pd.DataFrame, source: str, extra: dict | None = None) -> None:
+    """`extra` are the statistics of the refresh, e.g. the changed rows (see `bulk.refresh_table`)."""
     key = f'{source}-player'
     inactive = {'inactive': sum(~df['active'])} if source == 'fide' else {}
     with open_meta('w') as meta:
@@ -67,10 +86,38 @@ def write_player_meta(df: pd.DataFrame, source: str) -> None:
             'records': len(df),
             'last-updated': today_iso(),
             'date': RatingPeriod.current().isoformat()
-        } | inactive
+        } | inactive | (extra or {})
 
 
 def write_rating_meta(df: pd.DataFrame, period: RatingPeriod, source: str) -> None:
+    inactive = {'inactive': int(sum(~df['active']))} if source == 'fide' else {}
+    write_rating_stats({
+        'records': len(df),
+        'standard': int(sum(~df['standard_rating'].isna())),
+        'rapid': int(sum(~df['rapid_rating'].isna())),
+        'blitz': int(sum(~df['blitz_rating'].isna())),
+    } | inactive, period, source)
+
+
+def rating_stats(con: sqlite3.Connection, period: RatingPeriod, source: str) -> dict[str, int]:
+    """The numbers `write_rating_meta` counts in a DataFrame, counted in the database instead."""
+    inactive = ", SUM(NOT active) AS inactive" if source == 'fide' else ""
+    query = f"""
+    SELECT
+        COUNT(*) AS records,
+        COUNT(standard_rating) AS standard,
+        COUNT(rapid_rating) AS rapid,
+        COUNT(blitz_rating) AS blitz
+        {inactive}
+    FROM {source}_rating
+    WHERE date = ?;
+    """
+    cursor = con.execute(query, [period.isoformat()])
+    names = [column[0] for column in cursor.description]
+    return {name: value or 0 for name, value in zip(names, cursor.fetchone())}
+
+
+def write_rating_stats(stats: dict[str, int], period: RatingPeriod, source: str) -> None:
     key = f'{source}-rating'
 
     with open_meta('w') as meta:
@@ -78,16 +125,11 @@ def write_rating_meta(df: pd.DataFrame, period: RatingPeriod, source: str) -> No
         rating.setdefault('lists', [])
         rating.setdefault('total-records', 0)
 
-        inactive = {'inactive': sum(~df['active'])} if source == 'fide' else {}
         rating['lists'].append({
             'date': period.isoformat(),
             'updated-at': today_iso(),
-            'records': len(df),
-            'standard': sum(~df['standard_rating'].isna()),
-            'rapid': sum(~df['rapid_rating'].isna()),
-            'blitz': sum(~df['blitz_rating'].isna()),
-        } | inactive)
-        rating['total-records'] += len(df)
+        } | stats)
+        rating['total-records'] += stats['records']
         rating['last-updated'] = today_iso()
 
 
@@ -125,3 +167,35 @@ def remove_rating_meta(period: RatingPeriod, source: str) -> bool:
                 return True
             
         return False
+
+
+def bump_generation() -> int:
+    """
+    Increments the data generation. Caches in the API compare against this number,
+    so call it after every ingest that changed the database.
+    """
+    with open_meta('w') as meta:
+        meta['generation'] = meta.get('generation', 0) + 1
+        return meta['generation']
+
+
+_generation: tuple[int, int] | None = None
+
+
+def data_generation() -> int:
+    """
+    Returns the current data generation. The meta file is only read again
+    when it was modified, so this is cheap enough to call on every request.
+    """
+    global _generation
+
+    try:
+        mtime = meta_file.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+    if _generation is None or _generation[0] != mtime:
+        with open_meta() as meta:
+            _generation = (mtime, meta.get('generation', 0))
+
+    return _generation[1]
@@ -0,0 +1,19 @@
+import re
+import unicodedata
+
+# Letters NFKD doesn't split into a base letter and an accent.
+_LETTERS = str.maketrans({'đ': 'd', 'Đ': 'D', 'ø': 'o', 'Ø': 'O', 'ł': 'l', 'Ł': 'L', 'ß': 'ss', 'æ': 'ae', 'Æ': 'AE'})
+_SEPARATORS = re.compile(r"[\s.\-'’]+")
+_COMMA = re.compile(r'\s*,\s*')
+
+
+def normalize_name(name: str) -> str:
+    """
+    A name without the differences between the KNSB and FIDE lists that don't matter:
+    accents, case, hyphens, dots, apostrophes and spacing. 'Đukić,  Jean-Luc' becomes 'dukic, jean luc'.
+    """
+    if not name.isascii():
+        decomposed = unicodedata.normalize('NFKD', name.translate(_LETTERS))
+        name = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    spaced = _SEPARATORS.sub(' ', name.casefold())
+    return _COMMA.sub(', ', spaced).strip(' ,')
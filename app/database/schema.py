@@ -0,0 +1,26 @@
+import sqlite3
+
+from sqlalchemy import Table
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.models import Base
+
+dialect = sqlite.dialect()
+
+
+def create_table(con: sqlite3.Connection, table: Table) -> None:
+    con.execute(str(CreateTable(table, if_not_exists=True).compile(dialect=dialect)))
+
+
+def create_indexes(con: sqlite3.Connection, table: Table) -> None:
+    for index in table.indexes:
+        con.execute(str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect)))
+
+
+def create_schema(con: sqlite3.Connection) -> None:
+    """Creates the tables and indexes declared in `app.models` that don't exist yet."""
+    for table in Base.metadata.sorted_tables:
+        create_table(con, table)
+        create_indexes(con, table)
+    con.commit()
@@ -0,0 +1,89 @@
+"""
+Searching players by name with the FTS5 trigram tables of search.sql.
+
+A trigram index finds any substring of at least three characters, like `LIKE '%name%'`
+(case insensitive) but without scanning the whole table. Shorter names fall back to LIKE,
+that stops as soon as `limit` players are found.
+"""
+import pathlib
+import sqlite3
+
+from sqlalchemy import select, text
+from sqlalchemy.sql import Executable
+
+query_path = pathlib.Path(__file__).resolve().parent / 'search.sql'
+
+# Player table: (its key, the triggers that keep its search table up to date).
+search_tables = {
+    table: (key, [f'{table}_search_insert', f'{table}_search_delete', f'{table}_search_update'])
+    for table, key in [('fide_player', 'fide_id'), ('knsb_player', 'knsb_id')]
+}
+
+
+def create_player_search(con: sqlite3.Connection) -> None:
+    """
+    Creates the search tables and their triggers if they don't exist yet.
+    A search table is filled from scratch when its triggers were missing,
+    e.g. for a new database or after the player table was recreated.
+    Search tables from before the length ordered rowids are replaced.
+    """
+    for table, (_, triggers) in search_tables.items():
+        (definition,) = con.execute("SELECT sql FROM sqlite_master WHERE name = ?;", [f'{table}_search']).fetchone() \
+            or ('',)
+        if definition and "content=''" not in definition:
+            con.execute(f"DROP TABLE {table}_search;")
+            for trigger in triggers:
+                con.execute(f'DROP TRIGGER IF EXISTS "{trigger}";')
+
+    existing = {name for (name,) in con.execute("SELECT name FROM sqlite_master WHERE type = 'trigger';")}
+    con.executescript(query_path.open().read())
+    for table, (key, triggers) in search_tables.items():
+        if not existing.issuperset(triggers):
+            print(f"Building {table}_search...")
+            con.execute(f"INSERT INTO {table}_search ({table}_search) VALUES ('delete-all');")
+            con.execute(f"""
+                INSERT INTO {table}_search (rowid, name)
+                SELECT coalesce(length(name), 0) << 32 | {key}, name FROM {table};
+            """)
+    con.commit()
+
+
+def player_search_query(model, name: str, limit: int, columns: list | None = None) -> Executable:
+    """
+    The players (`model` is FidePlayer or KnsbPlayer) with `name` in their name.
+    Players whose name starts with it come first, then the shortest names, so the closest
+    matches are on top. The names starting with it are found through the prefix index of search.sql,
+    the others through the trigrams, shortest first. Either way only the best `limit` are read.
+    With `columns` (of `model`), the rows are tuples of those instead of `model` objects.
+    """
+    if len(name) < 3:
+        return select(*(columns or [model])).where(model.name.contains(name, autoescape=True)).limit(limit)
+
+    table = model.__tablename__
+    key = model.__table__.primary_key.columns.keys()[0]
+    phrase = '"' + name.replace('"', '""') + '"'
+    selected = ', '.join(f'{table}.{column.name}' for column in columns) if columns else f'{table}.*'
+    # char(1114111) is the last code point, so the range is every lower(name) starting with lower(:name).
+    # Of the shortest 2 * limit matches at most limit - 1 start with `name`, unless those already
+    # fill the limit, so they contain the shortest of the others.
+    statement = text(f"""
+        WITH prefixed AS (
+            SELECT {key} AS id, 0 AS tier, length(name) AS length FROM {table}
+            WHERE lower(name) >= lower(:name) AND lower(name) < lower(:name) || char(1114111)
+            ORDER BY length(name), {key} LIMIT :limit
+        ), contained AS (
+            SELECT {table}.{key} AS id, 1 AS tier, length({table}.name) AS length FROM (
+                SELECT rowid & 4294967295 AS id FROM {table}_search
+                WHERE {table}_search MATCH :phrase ORDER BY rowid LIMIT 2 * :limit
+            ) AS found
+            JOIN {table} ON {table}.{key} = found.id
+            WHERE instr(lower({table}.name), lower(:name)) != 1
+        )
+        SELECT {selected} FROM (SELECT * FROM prefixed UNION ALL SELECT * FROM contained) AS ranked
+        JOIN {table} ON {table}.{key} = ranked.id
+        ORDER BY ranked.tier, ranked.length, ranked.id
+        LIMIT :limit
+    """).bindparams(phrase=phrase, name=name, limit=limit)
+    if columns:
+        return statement.columns(*columns)
+    return select(model).from_statement(statement)
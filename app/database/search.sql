@@ -0,0 +1,46 @@
+-- Trigram indexes for searching players by (part of) their name.
+-- They're contentless: the rowid of a name is `length(name) << 32 | id`, so a search returns the
+-- shortest names first (FTS5 returns rowids in order) and the player id is `rowid & 0xFFFFFFFF`.
+-- The triggers keep them up to date, ids stay below 2^32.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS fide_player_search USING fts5(
+    name, content='', tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS fide_player_search_insert AFTER INSERT ON fide_player BEGIN
+    INSERT INTO fide_player_search (rowid, name) VALUES (coalesce(length(new.name), 0) << 32 | new.fide_id, new.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS fide_player_search_delete AFTER DELETE ON fide_player BEGIN
+    INSERT INTO fide_player_search (fide_player_search, rowid, name)
+    VALUES ('delete', coalesce(length(old.name), 0) << 32 | old.fide_id, old.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS fide_player_search_update AFTER UPDATE OF fide_id, name ON fide_player BEGIN
+    INSERT INTO fide_player_search (fide_player_search, rowid, name)
+    VALUES ('delete', coalesce(length(old.name), 0) << 32 | old.fide_id, old.name);
+    INSERT INTO fide_player_search (rowid, name) VALUES (coalesce(length(new.name), 0) << 32 | new.fide_id, new.name);
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS knsb_player_search USING fts5(
+    name, content='', tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS knsb_player_search_insert AFTER INSERT ON knsb_player BEGIN
+    INSERT INTO knsb_player_search (rowid, name) VALUES (coalesce(length(new.name), 0) << 32 | new.knsb_id, new.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS knsb_player_search_delete AFTER DELETE ON knsb_player BEGIN
+    INSERT INTO knsb_player_search (knsb_player_search, rowid, name)
+    VALUES ('delete', coalesce(length(old.name), 0) << 32 | old.knsb_id, old.name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS knsb_player_search_update AFTER UPDATE OF knsb_id, name ON knsb_player BEGIN
+    INSERT INTO knsb_player_search (knsb_player_search, rowid, name)
+    VALUES ('delete', coalesce(length(old.name), 0) << 32 | old.knsb_id, old.name);
+    INSERT INTO knsb_player_search (rowid, name) VALUES (coalesce(length(new.name), 0) << 32 | new.knsb_id, new.name);
+END;
+
+-- Names starting with the searched text rank first, these find all of them (shortest first) without the trigrams.
+CREATE INDEX IF NOT EXISTS fide_player_name_prefix ON fide_player (lower(name), length(name));
+CREATE INDEX IF NOT EXISTS knsb_player_name_prefix ON knsb_player (lower(name), length(name));
@@ -0,0 +1,121 @@
+import datetime
+import os
+import pathlib
+import shutil
+import sqlite3
+from contextlib import contextmanager
+
+from config import settings
+
+from . import meta
+from .connection import connect_writer
+
+# These must have rows before a new database is swapped in.
+required_tables = [
+    'knsb_player', 'knsb_rating',
+    'fide_player', 'fide_rating',
+    'applicable_rating', 'suggest_player'
+]
+
+
+class ShadowDatabaseError(Exception):
+    pass
+
+
+def remove_database(path: pathlib.Path) -> None:
+    for file in [path, path.with_name(path.name + '-wal'), path.with_name(path.name + '-shm')]:
+        file.unlink(missing_ok=True)
+
+
+def check_database(path: pathlib.Path) -> None:
+    """Raises `ShadowDatabaseError` when the database at `path` is corrupt or has empty tables."""
+    con = sqlite3.connect(path)
+    try:
+        result = con.execute("PRAGMA quick_check;").fetchone()[0]
+        if result != 'ok':
+            raise ShadowDatabaseError(f"quick_check failed: {result}")
+
+        for table in required_tables:
+            count = con.execute(f'SELECT COUNT(*) FROM "{table}";').fetchone()[0]
+            print(f"{table}: {count} rows")
+            if count == 0:
+                raise ShadowDatabaseError(f"{table} is empty")
+    finally:
+        con.close()
+
+
+def swap_database(live: pathlib.Path, shadow: pathlib.Path) -> None:
+    """
+    Points `live` to `shadow` by atomically replacing the symlink.
+    New connections open the new file, connections that are still open keep reading the old one.
+    """
+    link = live.with_name(live.name + '.tmp')
+    link.unlink(missing_ok=True)
+    link.symlink_to(shadow.name)
+    os.replace(link, live)
+
+
+def remove_old_databases(live: pathlib.Path, keep: list[pathlib.Path | None]) -> None:
+    """Removes the databases built before, except `keep`. Open connections can still read them."""
+    keep_files = {path.resolve() for path in keep if path is not None}
+    for path in live.parent.glob(f'{live.stem}-*{live.suffix}'):
+        if path.resolve() not in keep_files:
+            remove_database(path)
+    # Left behind if `live` was a regular file before the first swap.
+    for suffix in ['-wal', '-shm']:
+        live.with_name(live.name + suffix).unlink(missing_ok=True)
+
+
+@contextmanager
+def shadow_database():
+    """
+    Builds a new database next to the live one and swaps it in when done.
+    Yields a writer connection to a copy of the live database. The meta file is redirected
+    to a copy too, so the API keeps serving the old data and meta until the swap.
+
+    After the block the new database is checked, the data generation is bumped and
+    `instance/database.db` becomes a symlink to the new file. Running API workers notice
+    the new file on their next request (see `app.models.get_session`).
+    On any error the new database is removed and the live one is left alone.
+    """
+    live = pathlib.Path(settings.database_path)
+    stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+    shadow = live.with_name(f'{live.stem}-{stamp}{live.suffix}')
+    shadow_meta = meta.meta_file.with_name(f'{meta.meta_file.stem}-{stamp}{meta.meta_file.suffix}')
+
+    if shadow.exists():
+        raise ShadowDatabaseError(f"{shadow} already exists")
+    previous = live.resolve() if live.is_symlink() else None
+
+    con = connect_writer(str(shadow))
+    try:
+        if live.exists():
+            print(f"Copying {live} to {shadow}...")
+            source = sqlite3.connect(live)
+            source.backup(con)
+            source.close()
+        if meta.meta_file.exists():
+            shutil.copy(meta.meta_file, shadow_meta)
+
+        with meta.redirect_meta(shadow_meta):
+            yield con
+            con.execute("PRAGMA optimize;")
+            con.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+            con.close()
+
+            print(f"Checking {shadow}...")
+            check_database(shadow)
+            meta.bump_generation()
+    except BaseException:
+        con.close()
+        remove_database(shadow)
+        shadow_meta.unlink(missing_ok=True)
+        raise
+
+    # Database first: the new generation makes the workers drop their cached rows,
+    # that should only happen once the new rows can be read.
+    swap_database(live, shadow)
+    os.replace(shadow_meta, meta.meta_file)
+    print(f"Swapped in {shadow}.")
+
+    remove_old_databases(live, keep=[shadow, previous])
@@ -0,0 +1,88 @@
+import queue
+import sqlite3
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+import pandas as pd
+
+from .bulk import frame_rows, upsert_statement
+
+T = TypeVar('T')
+
+_DONE = object()
+
+
+class _Failed:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def prefetch(items: Iterable[T], size: int) -> Iterator[T]:
+    """
+    Produces `items` (e.g. downloading and parsing chunks) in a separate thread,
+    at most `size` items ahead of the consumer (e.g. inserting them).
+    Errors of the producer are raised in the consumer.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=size)
+    stop = threading.Event()
+
+    def put(item) -> None:
+        # Don't block forever when the consumer stopped early.
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if stop.is_set():
+                    return
+                put(item)
+            put(_DONE)
+        except BaseException as e:
+            put(_Failed(e))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while (item := buffer.get()) is not _DONE:
+            if isinstance(item, _Failed):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+def upsert(
+    con: sqlite3.Connection,
+    table: str,
+    df: pd.DataFrame,
+    keys: list[str],
+    keep_existing: list[str] | None = None,
+    update_only: bool = False
+) -> None:
+    """
+    Writes the rows of `df` (index included) to `table` in one transaction.
+    Existing rows (by `keys`) are updated, except for the `keep_existing` columns that already
+    have a value. With `update_only`, rows that don't exist yet are skipped.
+    """
+    df = df.reset_index()
+    rows = frame_rows(df)
+
+    if update_only:
+        columns = [column for column in df.columns if column not in keys]
+        assignments = ', '.join(f'"{column}" = ?' for column in columns)
+        conditions = ' AND '.join(f'"{key}" = ?' for key in keys)
+        key_positions = [df.columns.get_loc(key) for key in keys]
+        column_positions = [df.columns.get_loc(column) for column in columns]
+        con.executemany(
+            f'UPDATE "{table}" SET {assignments} WHERE {conditions};',
+            ([row[i] for i in column_positions + key_positions] for row in rows)
+        )
+    else:
+        con.executemany(upsert_statement(table, list(df.columns), keys, keep_existing), rows)
+    con.commit()
@@ -0,0 +1,14 @@
+import pathlib
+import sqlite3
+
+from .normalize import normalize_name
+
+query_path = pathlib.Path(__file__).resolve().parent / 'suggest.sql'
+
+
+def refresh_suggest_player(con: sqlite3.Connection) -> None:
+    """Rebuilds the `suggest_player` table from the player tables."""
+    # Computes the search keys in suggest.sql.
+    con.create_function('normalize_name', 1, normalize_name, deterministic=True)
+    con.executescript(query_path.open().read())
+    con.commit()
@@ -6,22 +6,57 @@ CREATE TABLE suggest_player (
     fide_id INTEGER,
     comma_name TEXT NOT NULL,
     full_name TEXT NOT NULL,
+    -- normalize_name() of the names, see app/database/normalize.py.
+    comma_key TEXT NOT NULL,
+    full_key TEXT NOT NULL,
+    -- The standard rating on the latest list the player is on.
+    knsb_rating INTEGER,
+    fide_rating INTEGER,
+    -- Suggestions are ordered by it: Dutch players first, then active players, then by rating.
+    score INTEGER NOT NULL,
     FOREIGN KEY (knsb_id) REFERENCES knsb_player,
     FOREIGN KEY (fide_id) REFERENCES fide_player
 );
 
+INSERT INTO suggest_player (
+    knsb_id, fide_id, comma_name, full_name, comma_key, full_key, knsb_rating, fide_rating, score
+)
+SELECT
+    knsb_id, fide_id, comma_name, full_name, normalize_name(comma_name), normalize_name(full_name),
+    knsb_rating, fide_rating,
+    -- Ratings stay below 10000.
+    100000 * (fed = 'NED') + 10000 * active + MAX(COALESCE(knsb_rating, 0), COALESCE(fide_rating, 0))
+FROM (
+    SELECT
+        kp.knsb_id,
+        fp.fide_id,
+        COALESCE(kp.name, fp.name) AS comma_name,
+        SUBSTR(COALESCE(kp.name, fp.name), INSTR(COALESCE(kp.name, fp.name), ',') + 2) || ' ' ||
+        SUBSTR(COALESCE(kp.name, fp.name), 1, INSTR(COALESCE(kp.name, fp.name), ',') - 1) AS full_name,
+        COALESCE(kp.fed, fp.fed) AS fed,
+        -- KNSB has no inactive flag, everyone on its player list is a member.
+        COALESCE(fp.active, kp.knsb_id IS NOT NULL, 0) AS active,
+        kr.standard_rating AS knsb_rating,
+        fr.standard_rating AS fide_rating
+    FROM knsb_player kp
+    FULL OUTER JOIN fide_player fp
+    ON kp.fide_id = fp.fide_id
+    -- With MAX(), SQLite takes the other columns from the row with the latest date.
+    LEFT JOIN (
+        SELECT knsb_id, standard_rating, MAX(date) FROM knsb_rating GROUP BY knsb_id
+    ) kr ON kr.knsb_id = kp.knsb_id
+    LEFT JOIN (
+        SELECT fide_id, standard_rating, MAX(date) FROM fide_rating GROUP BY fide_id
+    ) fr ON fr.fide_id = fp.fide_id
+);
+
+-- After the insert, that's faster than updating them row by row.
 CREATE INDEX s_knsb_idx ON suggest_player (knsb_id);
 CREATE INDEX s_fide_idx ON suggest_player (fide_id);
-CREATE INDEX s_comma_idx ON suggest_player (comma_name COLLATE NOCASE);
-CREATE INDEX s_full_idx ON suggest_player (full_name COLLATE NOCASE);
-
-INSERT INTO suggest_player (knsb_id, fide_id, comma_name, full_name)
-SELECT
-    kp.knsb_id,
-    fp.fide_id,
-    COALESCE(kp.name, fp.name),
-    SUBSTR(COALESCE(kp.name, fp.name), INSTR(COALESCE(kp.name, fp.name), ',') + 2) || ' ' ||
-    SUBSTR(COALESCE(kp.name, fp.name), 1, INSTR(COALESCE(kp.name, fp.name), ',') - 1)
-FROM knsb_player kp
-FULL OUTER JOIN fide_player fp
-ON kp.fide_id = fp.fide_id;
+-- Covering: a prefix search is a range scan of the keys, without looking up the rows.
+CREATE INDEX s_comma_key_idx ON suggest_player (
+    comma_key, score, id, knsb_id, fide_id, comma_name, knsb_rating, fide_rating
+);
+CREATE INDEX s_full_key_idx ON suggest_player (
+    full_key, score, id, knsb_id, fide_id, comma_name, knsb_rating, fide_rating
+);
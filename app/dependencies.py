@@ -0,0 +1,14 @@
+import datetime
+from typing import Annotated
+
+from fastapi import Depends
+
+from app.rating.period import RatingPeriod
+
+
+async def rating_period(date: datetime.date) -> RatingPeriod:
+    # Async, so FastAPI doesn't hand it to the threadpool.
+    return RatingPeriod.from_date(date)
+
+
+RatingPeriodDep = Annotated[RatingPeriod, Depends(rating_period)]
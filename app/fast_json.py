@@ -0,0 +1,42 @@
+"""
+The opt-in fast path of the player and rating endpoints (`settings.fast_json`): the columns of the
+response model are selected as row tuples and encoded with orjson, without ORM objects and without
+validating them against the response model. The JSON is the same as through the response model,
+the ingest already guarantees the rows fit it.
+"""
+from functools import cache
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy import Column, Row, Select, bindparam, select
+
+
+@cache
+def response_columns(schema: type[BaseModel], model: type) -> tuple[list[str], list[Column]]:
+    """The JSON keys of `schema`, and the columns of `model` they come from (by validation alias)."""
+    keys = list(schema.model_fields)
+    table = model.__table__
+    columns = [table.c[field.validation_alias or key] for key, field in schema.model_fields.items()]
+    return keys, columns
+
+
+@cache
+def row_select(schema: type[BaseModel], model: type, *keys: str) -> Select:
+    """
+    The columns of `schema` of the row with the given `keys`, which are bound by name:
+    `session.execute(row_select(..., 'fide_id'), {'fide_id': fide_id})`.
+    Built once, building a statement takes longer than running it.
+    """
+    table = model.__table__
+    return select(*response_columns(schema, model)[1]).where(*(table.c[key] == bindparam(key) for key in keys))
+
+
+def json_response(schema: type[BaseModel], model: type, row: Row) -> Response:
+    keys = response_columns(schema, model)[0]
+    return Response(orjson.dumps(dict(zip(keys, row))), media_type='application/json')
+
+
+def json_list_response(schema: type[BaseModel], model: type, rows: list[Row]) -> Response:
+    keys = response_columns(schema, model)[0]
+    return Response(orjson.dumps([dict(zip(keys, row)) for row in rows]), media_type='application/json')
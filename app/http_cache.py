@@ -0,0 +1,145 @@
+"""
+HTTP caching of the GET endpoints. The data only changes with an ingest, and the bodies only with
+a deploy, so the ETag of every response is the response version plus the data generation: a request
+with a matching If-None-Match gets a 304 without running the endpoint. Optionally, the serialized
+bodies are kept in memory too.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.database.meta import data_generation
+
+# Per entry, besides the body and the headers.
+ENTRY_OVERHEAD = 200
+
+
+def response_version(app_version: str, openapi: dict, **settings) -> str:
+    """
+    Identifies how the responses are made: the version of the app, its response schemas
+    and the `settings` that change the bodies. A deploy that changes any of them changes the ETags.
+    """
+    made = json.dumps([app_version, openapi, settings], sort_keys=True, default=str)
+    return hashlib.sha256(made.encode()).hexdigest()[:12]
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """The weak comparison of RFC 9110, which If-None-Match uses."""
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in (tag.removeprefix('W/') for tag in tags)
+
+
+class ResponseCache:
+    """
+    An LRU cache of complete responses, bounded by memory. Like the row cache,
+    it's dropped as a whole when the data generation changes.
+    """
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.responses: OrderedDict[tuple, tuple[list[Message], int]] = OrderedDict()
+        self.size = 0
+        self.generation: int | None = None
+        self.lock = threading.Lock()
+
+    def check_generation(self, generation: int) -> None:
+        if generation == self.generation:
+            return
+
+        with self.lock:
+            self.responses.clear()
+            self.size = 0
+            self.generation = generation
+
+    def get(self, key: tuple) -> list[Message] | None:
+        with self.lock:
+            entry = self.responses.get(key)
+            if entry is None:
+                return None
+
+            self.responses.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: tuple, messages: list[Message], generation: int) -> None:
+        size = ENTRY_OVERHEAD + sum(
+            len(message.get('body', b'')) + sum(len(k) + len(v) for k, v in message.get('headers', []))
+            for message in messages
+        )
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            # Computed with the data of another generation.
+            if generation != self.generation:
+                return
+
+            old = self.responses.pop(key, None)
+            if old:
+                self.size -= old[1]
+
+            self.responses[key] = (messages, size)
+            self.size += size
+
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self.responses.popitem(last=False)
+                self.size -= evicted
+
+
+class HttpCacheMiddleware:
+    """
+    Adds an ETag and Cache-Control to the successful GET responses under `prefixes`,
+    answers a matching If-None-Match with 304 and, if `max_bytes` > 0, serves
+    the responses it has already seen from memory. `version` is a `response_version`.
+    """
+    def __init__(self, app: ASGIApp, prefixes: list[str], version: str, max_age: int, max_bytes: int = 0) -> None:
+        self.app = app
+        self.prefixes = tuple(prefixes)
+        self.version = version
+        self.cache_control = f'public, max-age={max_age}'.encode()
+        self.cache = ResponseCache(max_bytes) if max_bytes > 0 else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope['method'] != 'GET' or not scope['path'].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        generation = data_generation()
+        etag = f'"{self.version}-g{generation}"'
+        validators = [(b'etag', etag.encode()), (b'cache-control', self.cache_control)]
+
+        if_none_match = Headers(scope=scope).get('if-none-match')
+        if if_none_match and etag_matches(if_none_match, etag):
+            await send({'type': 'http.response.start', 'status': 304, 'headers': validators})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        key = (scope['path'], scope['query_string'])
+        if self.cache is not None:
+            self.cache.check_generation(generation)
+            messages = self.cache.get(key)
+            if messages is not None:
+                for message in messages:
+                    await send(message)
+                return
+
+        messages = []
+        cacheable = False
+
+        async def send_with_etag(message: Message) -> None:
+            nonlocal cacheable
+            if message['type'] == 'http.response.start' and message['status'] == 200:
+                cacheable = True
+                message = {**message, 'headers': [*message.get('headers', []), *validators]}
+
+            if cacheable and self.cache is not None:
+                messages.append(message)
+                if message['type'] == 'http.response.body' and not message.get('more_body', False):
+                    # One body message, so the cached response is sent in two.
+                    body = b''.join(m.get('body', b'') for m in messages[1:])
+                    self.cache.put(key, [messages[0], {'type': 'http.response.body', 'body': body}], generation)
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
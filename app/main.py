@@ -1,7 +1,14 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
+from config import settings
+
+from .http_cache import HttpCacheMiddleware, response_version
 from .routers import fide, knsb, suggest
+from .suggest_index import load_index
 
 description = """
 An API to find and calculate chess ratings.
@@ -12,6 +19,14 @@ and the KNSB (the Dutch Chess Federation, Koninklijke Nederlandse Schaakbond).
 You can also calculate your new expected (KNSB-)rating based on the games you have played in the last month.
 """
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Serving /suggest from memory, see app/suggest_index.py.
+    await run_in_threadpool(load_index)
+    yield
+
+
 app = FastAPI(
     title="FiMO chess API",
     description=description,
@@ -23,8 +38,23 @@ app = FastAPI(
     },
     docs_url=None,
     redoc_url="/docs",
+    lifespan=lifespan,
 )
 
+app.include_router(fide.router)
+app.include_router(knsb.router)
+app.include_router(suggest.router)
+
+
+# Inside the CORS middleware, which adds headers depending on the request.
+# After the routes are included: their response schemas are part of the ETags.
+app.add_middleware(
+    HttpCacheMiddleware,
+    prefixes=['/fide/', '/knsb/', '/suggest'],
+    version=response_version(app.version, app.openapi(), fast_json=settings.fast_json),
+    max_age=settings.http_max_age,
+    max_bytes=settings.response_cache_mb * 1024 * 1024,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,7 +63,3 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-app.include_router(fide.router)
-app.include_router(knsb.router)
-app.include_router(suggest.router)
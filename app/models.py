@@ -1,8 +1,15 @@
+import os
 from typing import Annotated
 
 from fastapi import Depends
-from sqlalchemy import Boolean, Column, Date, Integer, String, create_engine
+from sqlalchemy import (Boolean, Column, Date, Float, Integer, String,
+                        create_engine, event)
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.pool import NullPool
+
+from app.database.connection import read_pragmas, write_pragmas
+from config import settings
 
 Base = declarative_base()
 
@@ -74,26 +81,87 @@ class FideRating(Base):
     blitz_k = Column(Integer, nullable=True)
 
 
+class ApplicableRating(Base):
+    """
+    The applicable rating of a KNSB player, precomputed by the ingest
+    (see app/database/applicable_rating.sql). `rating` is NULL when there is none.
+    """
+    __tablename__ = 'applicable_rating'
+    __table_args__ = {'sqlite_with_rowid': False}
+
+    knsb_id = Column(Integer, primary_key=True)
+    date = Column(Date, primary_key=True)
+    game_type = Column(String, primary_key=True)
+    for_opponent = Column(Boolean, primary_key=True)
+
+    rating = Column(Integer, nullable=True)
+    nv_value = Column(Float, nullable=True)
+    source = Column(String, nullable=True)
+
+
 class SuggestPlayer(Base):
     __tablename__ = 'suggest_player'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     knsb_id = Column(Integer, index=True, nullable=True)
     fide_id = Column(Integer, index=True, nullable=True)
-    comma_name = Column(String, index=True, nullable=False)
-    full_name = Column(String, index=True, nullable=False)
-
-
-sqlite_file_name = 'instance/database.db'
+    comma_name = Column(String, nullable=False)
+    full_name = Column(String, nullable=False)
+    # Normalized names for prefix searches, see app/database/suggest.sql.
+    comma_key = Column(String, nullable=False)
+    full_key = Column(String, nullable=False)
+    # Current standard ratings and the ranking of the suggestions.
+    knsb_rating = Column(Integer, nullable=True)
+    fide_rating = Column(Integer, nullable=True)
+    score = Column(Integer, nullable=False)
+
+
+sqlite_file_name = settings.database_path
 sqlite_url = f'sqlite:///{sqlite_file_name}'
+async_sqlite_url = f'sqlite+aiosqlite:///{sqlite_file_name}'
+
+# Only used to create the schema (and switch the database to WAL).
+writer_engine = create_engine(sqlite_url, poolclass=NullPool)
+event.listen(writer_engine, 'connect', write_pragmas)
+Base.metadata.create_all(bind=writer_engine)
 
 connect_args = {'check_same_thread': False}
-engine = create_engine(sqlite_url, connect_args=connect_args)
-Base.metadata.create_all(bind=engine)
+engine = create_engine(sqlite_url, connect_args=connect_args, pool_size=settings.read_pool_size)
+event.listen(engine, 'connect', read_pragmas)
+
+# The read endpoints use an async engine, so they don't wait in the threadpool.
+async_engine = create_async_engine(async_sqlite_url, pool_size=settings.read_pool_size)
+event.listen(async_engine.sync_engine, 'connect', read_pragmas)
+
+# The file each engine's pooled connections have open. The shadow ingest
+# swaps in a new database by replacing the symlink at `sqlite_file_name`.
+_opened_files: dict[str, str] = {}
+
+
+def database_swapped(name: str) -> bool:
+    """Whether the database file changed since engine `name` last asked."""
+    path = os.path.realpath(sqlite_file_name)
+    swapped = _opened_files.setdefault(name, path) != path
+    _opened_files[name] = path
+    return swapped
+
 
 def get_session():
+    if database_swapped('sync'):
+        # Connections still in use keep reading the old file until they're returned.
+        engine.dispose()
     with Session(engine) as session:
         yield session
 
 
 SessionDep = Annotated[Session, Depends(get_session)]
+
+
+async def get_async_session():
+    if database_swapped('async'):
+        await async_engine.dispose()
+    async with AsyncSession(async_engine) as session:
+        yield session
+
+
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
@@ -1,6 +1,7 @@
-from .db import DatabaseRepository
+from .cache import CachingRepository
+from .db import DatabaseRepository, PrefetchRepository
 from .domain.exc import PlayerNotFoundError
 from .period import RatingPeriod
-from .verification.calculate import calculate_new_rating
+from .verification.calculate import calculate_new_rating, calculate_new_ratings
 from .verification.exc import VerificationError
-from .verification.models import GameList, ListCalculation
+from .verification.models import GameList, ListCalculation, LookupStats
@@ -0,0 +1,84 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from .domain.exc import PlayerNotFoundError
+from .period import RatingPeriod
+from .repository import (ApplicableRating, FidePlayer, FideRating,
+                         KnsbPlayer, KnsbRating, RatingRepository)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MethodStats:
+    hits: int = 0
+    misses: int = 0
+    seconds: float = 0.0
+
+
+class CachingRepository:
+    """
+    Memoizes the lookups of another repository for the length of one calculation.
+    Misses (`PlayerNotFoundError`) are cached as well.
+    """
+    def __init__(self, repo: RatingRepository) -> None:
+        self.repo = repo
+        self.cache: dict[str, dict[tuple, Any]] = {}
+        self.stats: dict[str, MethodStats] = {}
+
+    def lookup(self, method: str, fn: Callable, *key) -> Any:
+        cache = self.cache.setdefault(method, {})
+        stats = self.stats.setdefault(method, MethodStats())
+
+        if key in cache:
+            stats.hits += 1
+            value = cache[key]
+        else:
+            stats.misses += 1
+            start = time.perf_counter()
+            try:
+                value = fn(*key)
+            except PlayerNotFoundError as e:
+                value = e
+            finally:
+                stats.seconds += time.perf_counter() - start
+            cache[key] = value
+
+        if isinstance(value, PlayerNotFoundError):
+            raise PlayerNotFoundError(*value.args)
+        return value
+
+    def get_knsb(self, knsb_id: int) -> KnsbPlayer:
+        return self.lookup('get_knsb', self.repo.get_knsb, knsb_id)
+
+    def get_fide(self, fide_id: int) -> FidePlayer:
+        return self.lookup('get_fide', self.repo.get_fide, fide_id)
+
+    def get_knsb_from_fide(self, fide_id: int) -> KnsbPlayer | None:
+        return self.lookup('get_knsb_from_fide', self.repo.get_knsb_from_fide, fide_id)
+
+    def get_knsb_rating(self, knsb_id: int, period: RatingPeriod) -> KnsbRating | None:
+        return self.lookup('get_knsb_rating', self.repo.get_knsb_rating, knsb_id, period)
+
+    def get_fide_rating(self, fide_id: int, period: RatingPeriod) -> FideRating | None:
+        return self.lookup('get_fide_rating', self.repo.get_fide_rating, fide_id, period)
+
+    def get_applicable_rating(
+        self,
+        knsb_id: int,
+        period: RatingPeriod,
+        game_type: str,
+        for_opponent: bool
+    ) -> ApplicableRating | None:
+        return self.lookup('get_applicable_rating', self.repo.get_applicable_rating,
+                           knsb_id, period, game_type, for_opponent)
+
+    def has_played_game(self, knsb_id: int) -> bool:
+        return self.repo.has_played_game(knsb_id)
+
+    def log_stats(self) -> None:
+        for method, stats in self.stats.items():
+            logger.debug("%s: %d hits, %d misses, %.2f ms",
+                         method, stats.hits, stats.misses, stats.seconds * 1000)
@@ -0,0 +1,44 @@
+import math
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models import ApplicableRating
+
+from .db import DatabaseRepository
+from .domain.models import GameType, Player, RatingContext
+from .domain.rules.applicable_rating import reference_applicable_rating
+from .period import RatingPeriod
+
+
+def check_applicable_rating(session: Session, sample_size: int = 1000) -> list[str]:
+    """
+    Compares a random sample of the materialized `applicable_rating` table
+    with the reference rules in `reference_applicable_rating`.
+    Returns a description of every mismatch.
+    """
+    repo = DatabaseRepository(session)
+    query = select(ApplicableRating).order_by(func.random()).limit(sample_size)
+
+    mismatches = []
+    for row in session.execute(query).scalars().all():
+        knsb = repo.get_knsb(row.knsb_id)
+        player = Player(row.knsb_id, knsb.fide_id)
+        ctx = RatingContext(GameType(row.game_type), RatingPeriod.from_date(row.date))
+
+        expected = reference_applicable_rating(player, ctx, repo, row.for_opponent)
+        if expected is None:
+            matches = row.rating is None
+        else:
+            matches = (
+                row.rating == expected.rating and
+                row.source == expected.source.value and
+                row.nv_value is not None and
+                math.isclose(row.nv_value, expected.nv_value)
+            )
+
+        if not matches:
+            mismatches.append(f"{row.knsb_id} {row.date} {row.game_type} for_opponent={row.for_opponent}: "
+                              f"{row.rating} ({row.source}), verwacht {expected}")
+
+    return mismatches
@@ -1,18 +1,38 @@
+import datetime
+from typing import Any, Callable, Hashable, Iterable
+
 from sqlmodel import select
 
-from app.models import (FidePlayer, FideRating, KnsbPlayer, KnsbRating,
-                        SessionDep)
+from app.models import (ApplicableRating, FidePlayer, FideRating, KnsbPlayer,
+                        KnsbRating, SessionDep)
 
 from .domain.exc import PlayerNotFoundError
 from .period import RatingPeriod
+from .row_cache import MISSING, row_cache
+from .verification.models import GameList
 
 
 class DatabaseRepository:
     def __init__(self, session: SessionDep) -> None:
         self.session = session
+        row_cache.check_generation()
+
+    def cached(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        row = row_cache.get(key)
+        if row is MISSING:
+            row = load()
+            self.keep(key, row)
+        return row
+
+    def keep(self, key: Hashable, row: Any) -> None:
+        # Rows are shared between requests, so detach them from this session.
+        if row is not None and row in self.session:
+            self.session.expunge(row)
+        row_cache.put(key, row)
         
     def get_knsb(self, knsb_id: int) -> KnsbPlayer:
-        result = self.session.get(KnsbPlayer, knsb_id)
+        result = self.cached(('knsb_player', knsb_id),
+                             lambda: self.session.get(KnsbPlayer, knsb_id))
         if result:
             return result
             
@@ -20,7 +40,8 @@ class DatabaseRepository:
                                     "was niet gevonden in de KNSB database.")
     
     def get_fide(self, fide_id: int) -> FidePlayer:
-        result = self.session.get(FidePlayer, fide_id)
+        result = self.cached(('fide_player', fide_id),
+                             lambda: self.session.get(FidePlayer, fide_id))
         if result:
             return result
             
@@ -29,13 +50,151 @@ class DatabaseRepository:
     
     def get_knsb_from_fide(self, fide_id: int) -> KnsbPlayer | None:
         query = select(KnsbPlayer).where(KnsbPlayer.fide_id == fide_id)
-        return self.session.execute(query).scalar_one_or_none()
+        return self.cached(('knsb_from_fide', fide_id),
+                           lambda: self.session.execute(query).scalar_one_or_none())
 
     def get_knsb_rating(self, knsb_id: int, period: RatingPeriod) -> KnsbRating | None:
-        return self.session.get(KnsbRating, (knsb_id, period.as_date()))
+        key = (knsb_id, period.as_date())
+        return self.cached(('knsb_rating',) + key,
+                           lambda: self.session.get(KnsbRating, key))
 
     def get_fide_rating(self, fide_id: int, period: RatingPeriod) -> FideRating | None:
-        return self.session.get(FideRating, (fide_id, period.as_date()))
+        key = (fide_id, period.as_date())
+        return self.cached(('fide_rating',) + key,
+                           lambda: self.session.get(FideRating, key))
+
+    def get_applicable_rating(
+        self,
+        knsb_id: int,
+        period: RatingPeriod,
+        game_type: str,
+        for_opponent: bool
+    ) -> ApplicableRating | None:
+        key = (knsb_id, period.as_date(), game_type, for_opponent)
+        return self.cached(('applicable_rating',) + key,
+                           lambda: self.session.get(ApplicableRating, key))
 
     def has_played_game(self, knsb_id: int) -> bool:
         return True
+
+
+class PrefetchRepository(DatabaseRepository):
+    """
+    Loads every player and rating row the given game lists can touch
+    in a handful of `IN (...)` queries and answers from memory afterwards.
+    Rows already in the process-wide cache are not queried again.
+    Lookups outside the prefetched set fall back to the database.
+    """
+    def __init__(self, session: SessionDep, *game_lists: GameList) -> None:
+        super().__init__(session)
+        self.rows: dict[Hashable, Any] = {}
+
+        knsb_ids, fide_ids, dates = self.collect(game_lists)
+        self.prefetch(knsb_ids, fide_ids, dates)
+
+    @staticmethod
+    def collect(game_lists: Iterable[GameList]) -> tuple[set[int], set[int], set[datetime.date]]:
+        knsb_ids = set()
+        fide_ids = set()
+        dates = set()
+
+        for game_list in game_lists:
+            players = [game_list.player] + [game.opponent for game in game_list.games]
+            for player in players:
+                if player.knsb_id:
+                    knsb_ids.add(player.knsb_id)
+                if player.fide_id:
+                    fide_ids.add(player.fide_id)
+
+            dates.add(game_list.period.as_date())
+            dates.update(game.period.as_date() for game in game_list.games)
+
+        return knsb_ids, fide_ids, dates
+
+    def uncached(self, keys: Iterable[tuple]) -> set[tuple]:
+        """Copies the cached rows for `keys` and returns the keys that still have to be queried."""
+        missing = set()
+        for key in keys:
+            row = row_cache.get(key)
+            if row is MISSING:
+                missing.add(key)
+            else:
+                self.rows[key] = row
+        return missing
+
+    def store(self, keys: Iterable[tuple], found: dict[tuple, Any]) -> None:
+        for key in keys:
+            self.rows[key] = found.get(key)
+            self.keep(key, self.rows[key])
+
+    def players(self, table: str) -> list[Any]:
+        return [row for key, row in self.rows.items() if key[0] == table and row]
+
+    def prefetch(self, knsb_ids: set[int], fide_ids: set[int], dates: set[datetime.date]) -> None:
+        # De KNSB spelers die we nodig hebben, direct of via hun FIDE ID.
+        knsb_keys = self.uncached(('knsb_player', i) for i in knsb_ids)
+        from_fide_keys = self.uncached(('knsb_from_fide', i) for i in fide_ids)
+        if knsb_keys or from_fide_keys:
+            query = select(KnsbPlayer).where(
+                KnsbPlayer.knsb_id.in_([i for _, i in knsb_keys]) |
+                KnsbPlayer.fide_id.in_([i for _, i in from_fide_keys])
+            )
+            found = {}
+            for knsb in self.session.execute(query).scalars():
+                found['knsb_player', knsb.knsb_id] = knsb
+                key = ('knsb_from_fide', knsb.fide_id)
+                if key in from_fide_keys:
+                    if key in found:
+                        # Bij meerdere matches laten we de database de fout geven.
+                        from_fide_keys.discard(key)
+                    found[key] = knsb
+
+            self.store(knsb_keys | {k for k in found if k[0] == 'knsb_player'}, found)
+            self.store(from_fide_keys, found)
+
+        knsb_players = self.players('knsb_player')
+        knsb_ids = knsb_ids | {k.knsb_id for k in knsb_players}
+        fide_ids = fide_ids | {k.fide_id for k in knsb_players if k.fide_id}
+
+        fide_keys = self.uncached(('fide_player', i) for i in fide_ids)
+        if fide_keys:
+            query = select(FidePlayer).where(FidePlayer.fide_id.in_([i for _, i in fide_keys]))
+            found = {('fide_player', f.fide_id): f for f in self.session.execute(query).scalars()}
+            self.store(fide_keys, found)
+
+        rating_keys = self.uncached(('knsb_rating', i, d) for i in knsb_ids for d in dates)
+        if rating_keys:
+            query = select(KnsbRating).where(
+                KnsbRating.knsb_id.in_(list({i for _, i, _ in rating_keys})) &
+                KnsbRating.date.in_(list({d for _, _, d in rating_keys}))
+            )
+            found = {('knsb_rating', r.knsb_id, r.date): r for r in self.session.execute(query).scalars()}
+            self.store(rating_keys, found)
+
+        rating_keys = self.uncached(('fide_rating', i, d) for i in fide_ids for d in dates)
+        if rating_keys:
+            query = select(FideRating).where(
+                FideRating.fide_id.in_(list({i for _, i, _ in rating_keys})) &
+                FideRating.date.in_(list({d for _, _, d in rating_keys}))
+            )
+            found = {('fide_rating', r.fide_id, r.date): r for r in self.session.execute(query).scalars()}
+            self.store(rating_keys, found)
+
+        applicable_keys = self.uncached(
+            ('applicable_rating', i, d, game_type, for_opponent)
+            for i in knsb_ids for d in dates
+            for game_type in ('STANDARD', 'RAPID', 'BLITZ') for for_opponent in (False, True)
+        )
+        if applicable_keys:
+            query = select(ApplicableRating).where(
+                ApplicableRating.knsb_id.in_(list({i for _, i, _, _, _ in applicable_keys})) &
+                ApplicableRating.date.in_(list({d for _, _, d, _, _ in applicable_keys}))
+            )
+            found = {('applicable_rating', r.knsb_id, r.date, r.game_type, r.for_opponent): r
+                     for r in self.session.execute(query).scalars()}
+            self.store(applicable_keys, found)
+
+    def cached(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        if key in self.rows:
+            return self.rows[key]
+        return super().cached(key, load)
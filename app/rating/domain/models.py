@@ -1,3 +1,7 @@
+"""
+The domain objects are immutable and slotted: the rules share them between games
+and lists, and use them as dict keys.
+"""
 from dataclasses import dataclass
 from enum import Enum
 from typing import Literal
@@ -29,27 +33,27 @@ class RatingSource(str, Enum):
     CALC = "calculated"  # de voorspelde of berekende rating
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Player:
     knsb_id: int | None
     fide_id: int | None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RatingContext:
     game_type: GameType
     period: RatingPeriod
     lpr: int | None = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Game:
     opponent: Player
     result: Result
     period: RatingPeriod
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GameList:
     player: Player
     game_type: GameType
@@ -57,7 +61,7 @@ class GameList:
     games: list[Game]
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RatingResult:
     rating: int
     nv_value: float
@@ -65,7 +69,7 @@ class RatingResult:
     period: RatingPeriod
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GameCalculation:
     game: Game
     player_rating: RatingResult
@@ -76,7 +80,7 @@ class GameCalculation:
     counts: Literal[True] = True
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GameDoesNotCount:
     game: Game
     reason: str
@@ -86,14 +90,14 @@ class GameDoesNotCount:
 GameResult = GameCalculation | GameDoesNotCount
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class LprLimitation:
     lpr: int | None
     lower_limit: int | None
     upper_limit: int | None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ListCalculation:
     old_rating: RatingResult
     new_rating: RatingResult
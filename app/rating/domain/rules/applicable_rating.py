@@ -1,7 +1,7 @@
 from ...repository import FideRating, KnsbRating, RatingRepository
 from ..exc import PlayerNotFoundError
-from ..models import (GameType, Player, RatingContext, RatingResult,
-                      RatingSource)
+from ..models import (GameType, Player, RatingContext, RatingPeriod,
+                      RatingResult, RatingSource)
 from .tlpr import calculate_tlpr
 
 
@@ -83,6 +83,27 @@ def calculate_applicable_rating(
     repo: RatingRepository,
     for_opponent: bool = False
 ) -> RatingResult | None:
+    # Voor KNSB spelers is de rating meestal al berekend tijdens het inladen.
+    if player.knsb_id:
+        row = repo.get_applicable_rating(player.knsb_id, ctx.period, ctx.game_type.value, for_opponent)
+        if row:
+            if row.rating is None:
+                return
+            return RatingResult(row.rating, row.nv_value, RatingSource(row.source), ctx.period)  # type: ignore
+
+    return reference_applicable_rating(player, ctx, repo, for_opponent)
+
+
+def reference_applicable_rating(
+    player: Player,
+    ctx: RatingContext,
+    repo: RatingRepository,
+    for_opponent: bool = False
+) -> RatingResult | None:
+    """
+    The rules for the applicable rating. The same rules are materialized in
+    app/database/applicable_rating.sql, see `check_applicable_rating`.
+    """
     
     # We willen de get_fide functie alleen aanroepen als het echt
     # nodig is. Die is namelijk een stuk trager dan get_knsb.
@@ -125,6 +146,31 @@ def calculate_opponent_rating(opponent: Player, ctx: RatingContext, repo: Rating
     return calculate_tlpr(opponent, ctx, repo)
 
 
+# The opponent ratings of a calculation by (opponent, game type, period), see `shared_opponent_rating`.
+OpponentRatings = dict[tuple[Player, GameType, RatingPeriod], RatingResult | None]
+
+
+def shared_opponent_rating(
+    opponent: Player,
+    game_type: GameType,
+    period: RatingPeriod,
+    repo: RatingRepository,
+    ratings: OpponentRatings | None = None
+) -> RatingResult | None:
+    """
+    `calculate_opponent_rating`, determined once per opponent, game type and period in `ratings`.
+    It doesn't depend on the lpr of the player, so lists that share opponents can share `ratings`.
+    """
+    key = (opponent, game_type, period)
+    if ratings is not None and key in ratings:
+        return ratings[key]
+
+    rating = calculate_opponent_rating(opponent, RatingContext(game_type, period), repo)
+    if ratings is not None:
+        ratings[key] = rating
+    return rating
+
+
 def calculate_player_rating(player: Player, ctx: RatingContext, repo: RatingRepository) -> RatingResult:
     applicable_rating = calculate_applicable_rating(player, ctx, repo)
     if applicable_rating:
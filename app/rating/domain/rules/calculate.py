@@ -1,19 +1,28 @@
 from ...repository import RatingRepository
 from ..models import (GameList, GameType, ListCalculation, RatingContext,
                       RatingResult, RatingSource)
-from .applicable_rating import calculate_player_rating
+from .applicable_rating import OpponentRatings, calculate_player_rating
 from .bonus import calculate_rating_bonus
-from .lpr import calculate_lpr, calculate_lpr_limitation, limit_by_lpr
-from .rating_change import calculate_rating_change
+from .lpr import (calculate_lpr, calculate_lpr_limitation, calculate_lprs,
+                  limit_by_lpr)
+from .rating_change import calculate_rating_changes
 
 
 def calculate_new_rating(game_list: GameList, repo: RatingRepository):
-    lpr = calculate_lpr(game_list, repo)
+    opponent_ratings = {}
+    lpr = calculate_lpr(game_list, repo, opponent_ratings)
+    return calculate_with_lpr(game_list, lpr, repo, opponent_ratings)
 
-    results = [
-        calculate_rating_change(game_list.player, game, game_list.game_type, lpr, repo)
-        for game in game_list.games
-    ]
+
+def calculate_with_lpr(
+    game_list: GameList,
+    lpr: int | None,
+    repo: RatingRepository,
+    opponent_ratings: OpponentRatings | None = None
+) -> ListCalculation:
+    results = calculate_rating_changes(
+        game_list.player, game_list.games, game_list.game_type, lpr, repo, opponent_ratings
+    )
     delta = round(sum((r.delta for r in results if r.counts), start=0))  # type: ignore
 
     # dit is lastig, want wat als deze calculateing gebeurt op de eerste van de maand?
@@ -53,3 +62,12 @@ def calculate_new_rating(game_list: GameList, repo: RatingRepository):
         limitation,
         results
     )
+
+
+def calculate_new_ratings(game_lists: list[GameList], repo: RatingRepository) -> list[ListCalculation]:
+    # Alle lpr's worden in een keer opgelost.
+    # De ratings van tegenstanders die in meerdere lijsten voorkomen worden een keer bepaald.
+    opponent_ratings = {}
+    lprs = calculate_lprs(game_lists, repo, opponent_ratings)
+    return [calculate_with_lpr(game_list, lpr, repo, opponent_ratings)
+            for game_list, lpr in zip(game_lists, lprs)]
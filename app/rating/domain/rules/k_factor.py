@@ -1,4 +1,7 @@
 import math
+from collections.abc import Callable
+
+import numpy as np
 
 from ...repository import RatingRepository
 from ..models import Game, Player, RatingResult, Result
@@ -48,3 +51,36 @@ def k_is_halved(
         not is_junior(player, game.period, repo) and
         is_junior(game.opponent, game.period, repo)
     )
+
+
+def calculate_k_array(rating: np.ndarray, nv: np.ndarray, junior: np.ndarray) -> np.ndarray:
+    """Array version of `calculate_k_junior` and `calculate_k_senior`, per game."""
+    with np.errstate(divide='ignore'):
+        new_player_k = 216 / np.sqrt(nv)
+
+    junior_k = np.select(
+        [nv < 30, rating <= 2100, rating < 2400],
+        [new_player_k, 40, 25 - (rating - 2100) / 10],
+        10
+    )
+    senior_k = np.select(
+        [nv < 75, rating <= 2100, rating < 2400],
+        [new_player_k, 25, 25 - (rating - 2100) / 20],
+        10
+    )
+    return np.where(junior, junior_k, senior_k)
+
+
+def k_is_halved_array(
+    opponent_nv: np.ndarray,
+    wwe: np.ndarray,
+    player_junior: np.ndarray,
+    opponent_junior: Callable[[np.ndarray], np.ndarray]
+) -> np.ndarray:
+    """
+    Array version of `k_is_halved`. Like it, only looks up whether the opponent is a junior
+    where the other conditions hold: `opponent_junior` gets the indices of those games.
+    """
+    halved = (opponent_nv < 100) & (wwe < 0) & ~player_junior
+    halved[halved] = opponent_junior(np.flatnonzero(halved))
+    return halved
@@ -1,17 +1,23 @@
 import math
 
+import numpy as np
+
 from ...repository import RatingRepository
 from ..models import GameList, LprLimitation, RatingContext
-from .applicable_rating import (calculate_applicable_rating,
-                                calculate_opponent_rating)
+from .applicable_rating import (OpponentRatings, calculate_applicable_rating,
+                                shared_opponent_rating)
+from .numeric import erf, to_matrix
 
 
-def applicable_opponent_ratings(game_list: GameList, repo: RatingRepository) -> tuple[list[int], list[float]]:
+def applicable_opponent_ratings(
+    game_list: GameList,
+    repo: RatingRepository,
+    opponent_ratings: OpponentRatings | None = None
+) -> tuple[list[int], list[float]]:
     ratings = []
     scores = []
     for game in game_list.games:
-        ctx = RatingContext(game_list.game_type, game.period)
-        rating = calculate_opponent_rating(game.opponent, ctx, repo)
+        rating = shared_opponent_rating(game.opponent, game_list.game_type, game.period, repo, opponent_ratings)
         if rating is None:
             continue
 
@@ -21,32 +27,91 @@ def applicable_opponent_ratings(game_list: GameList, repo: RatingRepository) ->
     return ratings, scores
 
 
-def calculate_lpr(game_list: GameList, repo: RatingRepository) -> int | None:
-    ratings, scores = applicable_opponent_ratings(game_list, repo)
-    if len(ratings) == 0:
-        return
-    
-    wt = sum(scores)
-    nt = len(scores)
-    rct = sum(ratings) / nt
-    
-    if sum(scores) == 0 or sum(scores) == len(scores):
-        scores += [0.5]
-
-        # ik gok maar dat de rct gebruikt moet worden als
-        # de speler geen geldende rating heeft.
-        ctx = RatingContext(game_list.game_type, game_list.period)
-        speler_rating = calculate_applicable_rating(game_list.player, ctx, repo)
-        ratings += [speler_rating.rating if speler_rating else rct]
-
-    lpr = rct + 400 * (2*wt/nt - 1)
-    for _ in range(4):
-        z = [7*(lpr - r)/(2000 * math.sqrt(2)) for r in ratings]
-        S = wt - nt/2 - sum(math.erf(i) for i in z)/2
-        Sp = - 7/(2000*math.sqrt(2*math.pi)) * sum(math.exp(-i**2) for i in z)
-        lpr -= S / Sp
-
-    return round(lpr)
+def lpr_inputs(
+    game_list: GameList,
+    repo: RatingRepository,
+    opponent_ratings: OpponentRatings | None = None
+) -> tuple[list[int], list[float], float]:
+    """
+    Returns the opponent ratings, the scores and the rating of an extra draw.
+    The extra draw is only played (not NaN) when every game was won or every game was lost.
+    """
+    ratings, scores = applicable_opponent_ratings(game_list, repo, opponent_ratings)
+    if len(ratings) == 0 or 0 < sum(scores) < len(scores):
+        return ratings, scores, math.nan
+
+    # ik gok maar dat de rct gebruikt moet worden als
+    # de speler geen geldende rating heeft.
+    ctx = RatingContext(game_list.game_type, game_list.period)
+    speler_rating = calculate_applicable_rating(game_list.player, ctx, repo)
+    rct = sum(ratings) / len(ratings)
+    return ratings, scores, speler_rating.rating if speler_rating else rct
+
+
+def solve_lpr(
+    ratings: np.ndarray,
+    scores: np.ndarray,
+    extra: np.ndarray | None = None,
+    tolerance: float = 1e-6,
+    max_iterations: int = 4,
+) -> np.ndarray:
+    """
+    Solves the lpr of one list (1-D arrays) or many lists at once (2-D arrays,
+    one list per row, padded with NaN) using Newton's method.
+
+    `extra` holds the rating of the extra draw per list, see `lpr_inputs`.
+    Iteration stops when every step is smaller than `tolerance`, or after `max_iterations`.
+    The default of 4 iterations matches the original calculation exactly.
+    Returns the unrounded lpr per list, NaN for lists without rated opponents.
+    """
+    ratings = np.atleast_2d(np.asarray(ratings, dtype=float))
+    scores = np.atleast_2d(np.asarray(scores, dtype=float))
+
+    nt = np.sum(~np.isnan(scores), axis=1)
+    wt = np.nansum(scores, axis=1)
+    if extra is not None:
+        all_ratings = np.column_stack([ratings, extra])
+    else:
+        all_ratings = ratings
+
+    # Lege lijsten en uit de hand lopende iteraties geven NaN of inf.
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        rct = np.nansum(ratings, axis=1) / nt
+        lpr = rct + 400 * (2*wt/nt - 1)
+
+        for _ in range(max_iterations):
+            z = 7*(lpr[:, None] - all_ratings)/(2000 * math.sqrt(2))
+            S = wt - nt/2 - np.nansum(erf(z), axis=1)/2
+            Sp = - 7/(2000*math.sqrt(2*math.pi)) * np.nansum(np.exp(-z**2), axis=1)
+            step = S / Sp
+            lpr -= step
+
+            if not np.any(np.abs(step) >= tolerance):
+                break
+
+    return lpr
+
+
+def calculate_lprs(
+    game_lists: list[GameList],
+    repo: RatingRepository,
+    opponent_ratings: OpponentRatings | None = None
+) -> list[int | None]:
+    inputs = [lpr_inputs(game_list, repo, opponent_ratings) for game_list in game_lists]
+    lprs = solve_lpr(
+        to_matrix([ratings for ratings, _, _ in inputs]),
+        to_matrix([scores for _, scores, _ in inputs]),
+        np.array([extra for _, _, extra in inputs]),
+    )
+    return [round(float(lpr)) if math.isfinite(lpr) else None for lpr in lprs]
+
+
+def calculate_lpr(
+    game_list: GameList,
+    repo: RatingRepository,
+    opponent_ratings: OpponentRatings | None = None
+) -> int | None:
+    return calculate_lprs([game_list], repo, opponent_ratings)[0]
 
 
 def calculate_lpr_limitation(recent_rating: int, lpr: int | None, delta: int) -> LprLimitation:
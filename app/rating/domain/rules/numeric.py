@@ -0,0 +1,57 @@
+import math
+
+import numpy as np
+
+# Voorbij deze waarde is erf(x) in doubles gewoon ±1.
+ERF_LIMIT = 6.0
+# Kleine arrays zijn sneller (en exact gelijk) met math.erf per element.
+ERF_SMALL = 256
+
+# erf op [0, ERF_LIMIT) in stukken van ERF_WIDTH, elk benaderd met een
+# Chebyshev polynoom. De coefficienten komen van math.erf zelf.
+ERF_WIDTH = 0.25
+ERF_DEGREE = 14
+_erf_edges = np.arange(0, ERF_LIMIT, ERF_WIDTH)
+_erf_coefficients = np.array([
+    np.polynomial.chebyshev.chebinterpolate(
+        np.vectorize(lambda t, a=a: math.erf(a + (t + 1) * ERF_WIDTH / 2)), ERF_DEGREE
+    )
+    for a in _erf_edges
+])
+
+
+def erf(x: np.ndarray) -> np.ndarray:
+    """
+    Vectorized `math.erf`, numpy doesn't have one.
+    Large arrays use piecewise Chebyshev polynomials (absolute error below 1e-14),
+    small arrays just call `math.erf`. NaN stays NaN.
+    """
+    x = np.asarray(x, dtype=float)
+    if x.size <= ERF_SMALL:
+        return np.fromiter(map(math.erf, x.flat), float, x.size).reshape(x.shape)
+
+    ax = np.abs(x)
+    inside = ax < ERF_LIMIT
+    ax = np.where(inside, ax, 0.0)
+
+    piece = (ax // ERF_WIDTH).astype(np.intp)
+    t = 2 * (ax - _erf_edges[piece]) / ERF_WIDTH - 1
+    c = _erf_coefficients[piece]
+
+    # Clenshaw's recurrence.
+    b1 = np.zeros_like(t)
+    b2 = np.zeros_like(t)
+    for k in range(ERF_DEGREE, 0, -1):
+        b1, b2 = c[..., k] + 2 * t * b1 - b2, b1
+    result = c[..., 0] + t * b1 - b2
+
+    return np.where(inside, np.copysign(result, x), np.sign(x))
+
+
+def to_matrix(rows: list[list[float]]) -> np.ndarray:
+    """Stacks rows of unequal length into one 2-D array, padded with NaN."""
+    width = max((len(row) for row in rows), default=0)
+    matrix = np.full((len(rows), width), np.nan)
+    for i, row in enumerate(rows):
+        matrix[i, :len(row)] = row
+    return matrix
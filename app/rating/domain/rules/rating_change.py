@@ -1,11 +1,19 @@
 import math
+from collections.abc import Callable
+
+import numpy as np
 
 from ...repository import RatingRepository
 from ..models import (Game, GameCalculation, GameDoesNotCount, GameResult,
-                      GameType, Player, RatingContext)
-from .applicable_rating import (calculate_opponent_rating,
-                                calculate_player_rating)
-from .k_factor import calculate_k, k_is_halved
+                      GameType, Player, RatingContext, RatingPeriod,
+                      RatingResult)
+from .applicable_rating import (OpponentRatings, calculate_opponent_rating,
+                                calculate_player_rating,
+                                shared_opponent_rating)
+from .k_factor import (calculate_k, calculate_k_array, k_is_halved,
+                       k_is_halved_array)
+from .numeric import erf
+from .util import is_junior
 
 
 def calculate_we(rv: int) -> float:
@@ -45,3 +53,95 @@ def calculate_rating_change(
         k_factor,
         delta
     )
+
+
+def rating_change_arrays(
+    player_rating: np.ndarray,
+    player_nv: np.ndarray,
+    opponent_rating: np.ndarray,
+    opponent_nv: np.ndarray,
+    result: np.ndarray,
+    player_junior: np.ndarray,
+    opponent_junior: Callable[[np.ndarray], np.ndarray]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Computes W-We, the K factor and the rating change of many games in one go.
+    The arrays have one element per game, `opponent_junior` is as in `k_is_halved_array`.
+    Returns `(wwe, k_factor, delta)`.
+    """
+    we = 1/2 + erf(7*(player_rating - opponent_rating)/(2000*math.sqrt(2)))/2
+    wwe = result - we
+
+    k_factor = calculate_k_array(player_rating, player_nv, player_junior)
+    halved = k_is_halved_array(opponent_nv, wwe, player_junior, opponent_junior)
+    k_factor = np.where(halved, k_factor / 2, k_factor)
+
+    return wwe, k_factor, k_factor * wwe
+
+
+def calculate_rating_changes(
+    player: Player,
+    games: list[Game],
+    game_type: GameType,
+    lpr: int | None,
+    repo: RatingRepository,
+    opponent_ratings: OpponentRatings | None = None
+) -> list[GameResult]:
+    """
+    Same as calling `calculate_rating_change` for every game, but does
+    the arithmetic for all games at once with `rating_change_arrays`.
+    Ratings are only determined once per context, for opponents in `opponent_ratings`:
+    pass the same dict for lists that share opponents.
+    """
+    if opponent_ratings is None:
+        opponent_ratings = {}
+
+    player_ratings: dict[RatingPeriod, RatingResult] = {}
+
+    def player_rating_in(period: RatingPeriod) -> RatingResult:
+        if period not in player_ratings:
+            player_ratings[period] = calculate_player_rating(player, RatingContext(game_type, period, lpr), repo)
+        return player_ratings[period]
+
+    juniors: dict[tuple[Player, int], bool] = {}
+
+    def junior(rated: Player, period: RatingPeriod) -> bool:
+        key = (rated, period.year)
+        if key not in juniors:
+            juniors[key] = is_junior(rated, period, repo)
+        return juniors[key]
+
+    rated: list[tuple[Game, RatingResult | None]] = [
+        (game, shared_opponent_rating(game.opponent, game_type, game.period, repo, opponent_ratings))
+        for game in games
+    ]
+    counted = [(game, player_rating_in(game.period), opponent_rating)
+               for game, opponent_rating in rated if opponent_rating]
+
+    def opponent_junior(indices: np.ndarray) -> np.ndarray:
+        return np.array([junior(counted[i][0].opponent, counted[i][0].period) for i in indices], dtype=bool)
+
+    calculations: list[GameResult] = []
+    if counted:
+        wwe, k_factor, delta = rating_change_arrays(
+            np.array([p.rating for _, p, _ in counted], dtype=float),
+            np.array([p.nv_value for _, p, _ in counted], dtype=float),
+            np.array([o.rating for _, _, o in counted], dtype=float),
+            np.array([o.nv_value for _, _, o in counted], dtype=float),
+            np.array([g.result.value for g, _, _ in counted]),
+            np.array([junior(player, p.period) for _, p, _ in counted]),
+            opponent_junior,
+        )
+        calculations = [
+            GameCalculation(game, player_rating, opponent_rating, float(w), float(k), float(d))
+            for (game, player_rating, opponent_rating), w, k, d in zip(counted, wwe, k_factor, delta)
+        ]
+
+    # De berekende partijen staan in dezelfde volgorde als in `rated`.
+    remaining = iter(calculations)
+    return [
+        next(remaining) if opponent_rating
+        else GameDoesNotCount(game, "Kon de rating van de tegenstander niet bepalen.")
+        for game, opponent_rating in rated
+    ]
+
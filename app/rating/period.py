@@ -1,19 +1,34 @@
 from __future__ import annotations
 
 import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RatingPeriod:
+    """
+    A month, immutable. The date is made once, so hashing (it's a key of the repository caches)
+    and `as_date` are cheap.
+    """
     month: int
     year: int
+    date: datetime.date = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # The date checks the month too.
+        object.__setattr__(self, 'date', datetime.date(self.year, self.month, 1))
 
     def __str__(self) -> str:
-        return self.as_date().isoformat()
-    
+        return self.date.isoformat()
+
+    def __eq__(self, other: object) -> bool:
+        # Faster than the generated one, that compares tuples.
+        if other.__class__ is not RatingPeriod:
+            return NotImplemented
+        return self.month == other.month and self.year == other.year  # type: ignore
+
     def __hash__(self) -> int:
-        return self.as_date().__hash__()
+        return self.year * 12 + self.month
 
     @classmethod
     def current(cls) -> RatingPeriod:
@@ -23,10 +38,10 @@ class RatingPeriod:
     @classmethod
     def from_date(cls, date: datetime.date) -> RatingPeriod:
         return cls(date.month, date.year)
-    
+
     @classmethod
     def from_iso(cls, date: str) -> RatingPeriod:
         return cls.from_date(datetime.date.fromisoformat(date))
 
     def as_date(self) -> datetime.date:
-        return datetime.date(self.year, self.month, 1)
+        return self.date
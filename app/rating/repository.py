@@ -40,6 +40,12 @@ class FideRating(Protocol):
     blitz_k: int | None
 
 
+class ApplicableRating(Protocol):
+    rating: int | None
+    nv_value: float | None
+    source: str | None
+
+
 class RatingRepository(Protocol):
     def get_knsb(self, knsb_id: int) -> KnsbPlayer: ...
 
@@ -51,4 +57,12 @@ class RatingRepository(Protocol):
 
     def get_fide_rating(self, fide_id: int, period: RatingPeriod) -> FideRating | None: ...
 
+    def get_applicable_rating(
+        self,
+        knsb_id: int,
+        period: RatingPeriod,
+        game_type: str,
+        for_opponent: bool
+    ) -> ApplicableRating | None: ...
+
     def has_played_game(self, knsb_id: int) -> bool: ...
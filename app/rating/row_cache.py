@@ -0,0 +1,75 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from app.database.meta import data_generation
+from config import settings
+
+MISSING = object()
+
+
+def row_size(row: Any) -> int:
+    """Rough estimate of the memory a cached row takes up."""
+    size = sys.getsizeof(row)
+    attributes = getattr(row, '__dict__', None)
+    if attributes:
+        size += sys.getsizeof(attributes)
+        size += sum(sys.getsizeof(v) for v in attributes.values())
+    return size
+
+
+class RowCache:
+    """
+    A process-wide LRU cache of player and rating rows, bounded by memory.
+    Rows never change between ingests, so the whole cache is dropped
+    when the data generation changes.
+
+    Keys look like `('knsb_rating', knsb_id, date)`. Rows that don't exist
+    are cached as `None`, a key that isn't cached returns `MISSING`.
+    """
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.rows: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self.size = 0
+        self.generation: int | None = None
+        self.lock = threading.Lock()
+
+    def check_generation(self) -> None:
+        generation = data_generation()
+        if generation == self.generation:
+            return
+
+        with self.lock:
+            self.rows.clear()
+            self.size = 0
+            self.generation = generation
+
+    def get(self, key: Hashable) -> Any:
+        with self.lock:
+            entry = self.rows.get(key)
+            if entry is None:
+                return MISSING
+
+            self.rows.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Hashable, row: Any) -> None:
+        size = row_size(row)
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            old = self.rows.pop(key, None)
+            if old:
+                self.size -= old[1]
+
+            self.rows[key] = (row, size)
+            self.size += size
+
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self.rows.popitem(last=False)
+                self.size -= evicted
+
+
+row_cache = RowCache(settings.rating_cache_mb * 1024 * 1024)
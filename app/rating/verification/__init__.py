@@ -1,3 +1,3 @@
-from .calculate import calculate_new_rating
+from .calculate import calculate_new_rating, calculate_new_ratings
 from .exc import VerificationError
 from .models import GameList, ListCalculation
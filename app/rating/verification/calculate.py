@@ -1,7 +1,6 @@
-from dataclasses import asdict
-
 from ..domain.rules import calculate
 from ..repository import RatingRepository
+from .convert import ApiConverter, to_api_calculation
 from .models import GameList, ListCalculation
 from .verify import validate_game_list
 
@@ -9,4 +8,16 @@ from .verify import validate_game_list
 def calculate_new_rating(game_list: GameList, repo: RatingRepository) -> ListCalculation:
     domain_list = validate_game_list(game_list, repo)
     calculation = calculate.calculate_new_rating(domain_list, repo)
-    return ListCalculation.model_validate(asdict(calculation))
+    return to_api_calculation(calculation)
+
+
+def calculate_new_ratings(game_lists: list[GameList], repo: RatingRepository) -> list[ListCalculation]:
+    """
+    Calculates many lists with one repository, so players that appear
+    in several lists (e.g. all opponents in a tournament) are resolved once.
+    """
+    domain_lists = [validate_game_list(game_list, repo) for game_list in game_lists]
+    calculations = calculate.calculate_new_ratings(domain_lists, repo)
+    # One converter, the lists of a tournament share most periods and players.
+    converter = ApiConverter()
+    return [converter.calculation(c) for c in calculations]
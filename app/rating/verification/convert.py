@@ -0,0 +1,111 @@
+"""
+Converts between the API models and the domain dataclasses field by field.
+The API models coming in are validated already and the domain results are correct by construction,
+so nothing is copied to dicts first and nothing is validated again (`model_construct`).
+"""
+from typing import Callable
+
+from ..domain import models as domain
+from ..period import RatingPeriod
+from . import models as api
+
+# The enums of both sides have the same values.
+RESULTS = {result: domain.Result(result.value) for result in api.Result}
+GAME_TYPES = {game_type: domain.GameType(game_type.value) for game_type in api.GameType}
+SOURCES = {source: api.RatingSource(source.value) for source in domain.RatingSource}
+API_RESULTS = {result: api.Result(result.value) for result in domain.Result}
+
+
+def to_domain_period(period: api.RatingPeriod) -> RatingPeriod:
+    return RatingPeriod(period.month, period.year)
+
+
+def to_domain_game_list(
+    game_list: api.GameList,
+    to_player: Callable[[api.Player], domain.Player]
+) -> domain.GameList:
+    """`to_player` resolves the ids of a player of the list, see `validate_player`."""
+    return domain.GameList(
+        player=to_player(game_list.player),
+        game_type=GAME_TYPES[game_list.game_type],
+        period=to_domain_period(game_list.period),
+        games=[
+            domain.Game(to_player(game.opponent), RESULTS[game.result], to_domain_period(game.period))
+            for game in game_list.games
+        ],
+    )
+
+
+class ApiConverter:
+    """
+    Converts the results of one calculation. Periods, players and ratings repeat a lot
+    between the games (the same period, the player's own rating), their API models
+    are made once per value and shared.
+    """
+    def __init__(self) -> None:
+        self.periods: dict[RatingPeriod, api.RatingPeriod] = {}
+        self.players: dict[domain.Player, api.Player] = {}
+        self.ratings: dict[tuple, api.RatingResult] = {}
+
+    def period(self, period: RatingPeriod) -> api.RatingPeriod:
+        converted = self.periods.get(period)
+        if converted is None:
+            converted = self.periods[period] = api.RatingPeriod.model_construct(month=period.month, year=period.year)
+        return converted
+
+    def player(self, player: domain.Player) -> api.Player:
+        converted = self.players.get(player)
+        if converted is None:
+            converted = self.players[player] = api.Player.model_construct(
+                knsb_id=player.knsb_id, fide_id=player.fide_id
+            )
+        return converted
+
+    def rating(self, rating: domain.RatingResult) -> api.RatingResult:
+        key = (rating.rating, rating.nv_value, rating.source, rating.period)
+        converted = self.ratings.get(key)
+        if converted is None:
+            converted = self.ratings[key] = api.RatingResult.model_construct(
+                rating=rating.rating,
+                # Sometimes an int, the API model always has a float.
+                nv_value=float(rating.nv_value),
+                source=SOURCES[rating.source],
+                period=self.period(rating.period),
+            )
+        return converted
+
+    def game(self, game: domain.Game) -> api.Game:
+        return api.Game.model_construct(
+            opponent=self.player(game.opponent), result=API_RESULTS[game.result], period=self.period(game.period)
+        )
+
+    def game_result(self, result: domain.GameResult) -> api.GameResult:
+        if isinstance(result, domain.GameDoesNotCount):
+            return api.GameDoesNotCount.model_construct(game=self.game(result.game), reason=result.reason)
+
+        return api.GameCalculation.model_construct(
+            game=self.game(result.game),
+            player_rating=self.rating(result.player_rating),
+            opponent_rating=self.rating(result.opponent_rating),
+            wwe=float(result.wwe),
+            k_factor=float(result.k_factor),
+            delta=float(result.delta),
+        )
+
+    def calculation(self, calculation: domain.ListCalculation) -> api.ListCalculation:
+        limitation = calculation.lpr_limitation
+        return api.ListCalculation.model_construct(
+            old_rating=self.rating(calculation.old_rating),
+            new_rating=self.rating(calculation.new_rating),
+            played=calculation.played,
+            delta=calculation.delta,
+            bonus=calculation.bonus,
+            lpr_limitation=api.LprLimitation.model_construct(
+                lpr=limitation.lpr, lower_limit=limitation.lower_limit, upper_limit=limitation.upper_limit
+            ),
+            games=[self.game_result(result) for result in calculation.games],
+        )
+
+
+def to_api_calculation(calculation: domain.ListCalculation) -> api.ListCalculation:
+    return ApiConverter().calculation(calculation)
@@ -113,6 +113,12 @@ class LprLimitation(BaseModel):
     upper_limit: int | None
 
 
+class LookupStats(BaseModel):
+    hits: int
+    misses: int
+    seconds: float
+
+
 class ListCalculation(BaseModel):
     old_rating: RatingResult
     new_rating: RatingResult
@@ -121,3 +127,5 @@ class ListCalculation(BaseModel):
     bonus: int
     lpr_limitation: LprLimitation
     games: list[GameResult]
+    # Alleen gevuld (en in de response) als om debug informatie gevraagd is.
+    debug: Annotated[dict[str, LookupStats] | None, Field(exclude_if=lambda debug: debug is None)] = None
@@ -1,17 +1,16 @@
-from enum import Enum
 from functools import partial
 
-from dacite import Config, from_dict
-
 from ..domain.models import GameList, Player
 from ..repository import RatingRepository
+from .convert import to_domain_game_list
 from .exc import VerificationError
 from .models import GameList as GameListIn
+from .models import Player as PlayerIn
 
 
-def validate_player(player: dict[str, int], repo: RatingRepository) -> Player:
-    knsb_id = player.get("knsb_id")
-    fide_id = player.get("fide_id")
+def validate_player(player: PlayerIn, repo: RatingRepository) -> Player:
+    knsb_id = player.knsb_id
+    fide_id = player.fide_id
 
     if knsb_id:
         knsb = repo.get_knsb(knsb_id)
@@ -31,10 +30,7 @@ def validate_player(player: dict[str, int], repo: RatingRepository) -> Player:
 
 
 def validate_game_list(game_list: GameListIn, repo: RatingRepository) -> GameList:
-    validate = partial(validate_player, repo=repo)
-
-    config = Config(cast=[Enum], type_hooks={Player: validate})
-    domain_list = from_dict(GameList, game_list.model_dump(), config=config)
+    domain_list = to_domain_game_list(game_list, partial(validate_player, repo=repo))
     for game in domain_list.games:
         if game.opponent == domain_list.player:
             raise VerificationError("Een player kan niet tegen zichzelf spelen.")
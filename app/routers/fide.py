@@ -1,48 +1,64 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query
-from sqlmodel import select
+from fastapi import APIRouter, HTTPException, Path, Query
 
-from app.models import FidePlayer, FideRating, SessionDep
-from app.rating.period import RatingPeriod
+from app.database.search import player_search_query
+from app.dependencies import RatingPeriodDep
+from app.fast_json import (json_list_response, json_response,
+                           response_columns, row_select)
+from app.models import AsyncSessionDep, FidePlayer, FideRating
 from app.schemas import FidePlayerResponse, FideRatingResponse
+from config import settings
 
 router = APIRouter(prefix='/fide', tags=['fide'])
 
 
 @router.get('/players/search', response_model=list[FidePlayerResponse])
-def search_players(
-    session: SessionDep,
+async def search_players(
+    session: AsyncSessionDep,
     name: Annotated[str, Query(max_length=50)],
     limit: Annotated[int, Query(gt=0, lt=100)] = 10,
 ):
     """
     Get a list of players by name or id.
     """
-    query = select(FidePlayer).where(FidePlayer.name.contains(name, autoescape=True)).limit(limit)
-    return session.execute(query).scalars()
+    if settings.fast_json:
+        columns = response_columns(FidePlayerResponse, FidePlayer)[1]
+        result = await session.execute(player_search_query(FidePlayer, name, limit, columns))
+        return json_list_response(FidePlayerResponse, FidePlayer, result.all())
+
+    result = await session.execute(player_search_query(FidePlayer, name, limit))
+    return result.scalars().all()
 
 
 @router.get('/players/{fide_id}', response_model=FidePlayerResponse)
-def get_player(session: SessionDep, fide_id: Annotated[int, Path(gt=0)]):
-    player = session.get(FidePlayer, fide_id)
-    if player:
+async def get_player(session: AsyncSessionDep, fide_id: Annotated[int, Path(gt=0)]):
+    if settings.fast_json:
+        query = row_select(FidePlayerResponse, FidePlayer, 'fide_id')
+        result = await session.execute(query, {'fide_id': fide_id})
+        if row := result.first():
+            return json_response(FidePlayerResponse, FidePlayer, row)
+    elif player := await session.get(FidePlayer, fide_id):
         return player
     
     raise HTTPException(404, f"Geen spelers gevonden met FIDE ID {fide_id}.")
 
 
-@router.get('/ratings', response_model=list[FideRatingResponse])
-def get_ratings(
-    session: SessionDep,
+@router.get('/ratings', response_model=FideRatingResponse)
+async def get_ratings(
+    session: AsyncSessionDep,
     fide_id: Annotated[int, Query(gt=0)],
-    date: Annotated[RatingPeriod, Depends(RatingPeriod.from_date)]
+    date: RatingPeriodDep
 ):
     """
     Get a list of rating records per date and player id.
     """
-    rating = session.get(FideRating, (fide_id, date.as_date()))
-    if rating:
+    if settings.fast_json:
+        query = row_select(FideRatingResponse, FideRating, 'fide_id', 'date')
+        result = await session.execute(query, {'fide_id': fide_id, 'date': date.as_date()})
+        if row := result.first():
+            return json_response(FideRatingResponse, FideRating, row)
+    elif rating := await session.get(FideRating, (fide_id, date.as_date())):
         return rating
     
     raise HTTPException(404, f"Geen rating gevonden")
@@ -1,20 +1,25 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query
-from sqlalchemy import select
+from fastapi import APIRouter, Body, HTTPException, Path, Query
 
-from app.models import KnsbPlayer, KnsbRating, SessionDep
-from app.rating import (DatabaseRepository, GameList, ListCalculation,
-                        PlayerNotFoundError, RatingPeriod, VerificationError,
-                        calculate_new_rating)
+from app.database.search import player_search_query
+from app.dependencies import RatingPeriodDep
+from app.fast_json import (json_list_response, json_response,
+                           response_columns, row_select)
+from app.models import AsyncSessionDep, KnsbPlayer, KnsbRating, SessionDep
+from app.rating import (CachingRepository, GameList, ListCalculation,
+                        LookupStats, PlayerNotFoundError, PrefetchRepository,
+                        VerificationError, calculate_new_rating,
+                        calculate_new_ratings)
 from app.schemas import KnsbPlayerResponse, KnsbRatingResponse
+from config import settings
 
 router = APIRouter(prefix='/knsb', tags=['knsb'])
 
 
 @router.get('/players/search', response_model=list[KnsbPlayerResponse])
-def search_players(
-    session: SessionDep,
+async def search_players(
+    session: AsyncSessionDep,
     name: Annotated[str, Query(max_length=50)],
     limit: Annotated[int, Query(gt=0, lt=100)] = 10,
 ):
@@ -22,48 +27,97 @@ def search_players(
     Get a list of players by name.
     """ 
     
-    query = select(KnsbPlayer).where(KnsbPlayer.name.contains(name, autoescape=True)).limit(limit)
-    return session.execute(query).scalars()
+    if settings.fast_json:
+        columns = response_columns(KnsbPlayerResponse, KnsbPlayer)[1]
+        result = await session.execute(player_search_query(KnsbPlayer, name, limit, columns))
+        return json_list_response(KnsbPlayerResponse, KnsbPlayer, result.all())
+
+    result = await session.execute(player_search_query(KnsbPlayer, name, limit))
+    return result.scalars().all()
 
 
 @router.get('/players/{knsb_id}', response_model=KnsbPlayerResponse)
-def get_player(session: SessionDep, knsb_id: Annotated[int, Path(gt=0)]):
-    player = session.get(KnsbPlayer, knsb_id)
-    if player:
+async def get_player(session: AsyncSessionDep, knsb_id: Annotated[int, Path(gt=0)]):
+    if settings.fast_json:
+        query = row_select(KnsbPlayerResponse, KnsbPlayer, 'knsb_id')
+        result = await session.execute(query, {'knsb_id': knsb_id})
+        if row := result.first():
+            return json_response(KnsbPlayerResponse, KnsbPlayer, row)
+    elif player := await session.get(KnsbPlayer, knsb_id):
         return player
     
     raise HTTPException(404, f"Geen spelers gevonden met KNSB ID {knsb_id}.")
 
 
 @router.get('/ratings', response_model=KnsbRatingResponse)
-def get_ratings(
-    session: SessionDep,
+async def get_ratings(
+    session: AsyncSessionDep,
     knsb_id: Annotated[int, Query(gt=0)],
-    date: Annotated[RatingPeriod, Depends(RatingPeriod.from_date)]
+    date: RatingPeriodDep
 ):
     """
     Get a list of rating records per date and player id.
     """
-    rating = session.get(KnsbRating, (knsb_id, date.as_date()))
-    if rating:
+    if settings.fast_json:
+        query = row_select(KnsbRatingResponse, KnsbRating, 'knsb_id', 'date')
+        result = await session.execute(query, {'knsb_id': knsb_id, 'date': date.as_date()})
+        if row := result.first():
+            return json_response(KnsbRatingResponse, KnsbRating, row)
+    elif rating := await session.get(KnsbRating, (knsb_id, date.as_date())):
         return rating
     
     raise HTTPException(404, f"Geen rating gevonden")
 
 
 @router.post('/calculate', response_model=ListCalculation)
-def calculate_rating(session: SessionDep, game_list: GameList):
+def calculate_rating(
+    session: SessionDep,
+    game_list: GameList,
+    debug: Annotated[bool, Query()] = False,
+):
     """
     Calculate the new rating of a player based on recent games played.
+    With `debug`, the response includes lookup statistics per repository method.
     """
     # TODO Unit tests voor het rating berekenen.
     # TODO Wat als de datum van de partij in het ver verleden is?
     # TODO Als de berekendatum heel ver in het verleden is (voordat er een rating record beschikbaar is)
     #  gebruiken we dan de lpr of geven we een error?
     try:
-        repo = DatabaseRepository(session)
+        repo = CachingRepository(PrefetchRepository(session, game_list))
         resultaat = calculate_new_rating(game_list, repo)
     except (PlayerNotFoundError, VerificationError) as e:
         raise HTTPException(status_code=400, detail=e.args)
 
+    repo.log_stats()
+    if debug:
+        resultaat.debug = {method: LookupStats.model_validate(stats, from_attributes=True)
+                           for method, stats in repo.stats.items()}
+
     return resultaat
+
+
+@router.post('/calculate/batch', response_model=list[ListCalculation])
+def calculate_ratings(
+    session: SessionDep,
+    game_lists: Annotated[list[GameList], Body(max_length=500)],
+    debug: Annotated[bool, Query()] = False,
+):
+    """
+    Calculate the new ratings of many players at once, for example all participants of a tournament.
+    Returns one calculation per list, in the same order.
+    """
+    try:
+        repo = CachingRepository(PrefetchRepository(session, *game_lists))
+        resultaten = calculate_new_ratings(game_lists, repo)
+    except (PlayerNotFoundError, VerificationError) as e:
+        raise HTTPException(status_code=400, detail=e.args)
+
+    repo.log_stats()
+    if debug:
+        stats = {method: LookupStats.model_validate(stats, from_attributes=True)
+                 for method, stats in repo.stats.items()}
+        for resultaat in resultaten:
+            resultaat.debug = stats
+
+    return resultaten
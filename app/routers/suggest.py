@@ -1,30 +1,55 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Path, Query
-from sqlalchemy import select
+from sqlalchemy import Select, select, union
 
-from app.models import SessionDep, SuggestPlayer
+from app.database.normalize import normalize_name
+from app.models import AsyncSessionDep, SuggestPlayer
 from app.schemas import SuggestPlayerResponse
+from app.suggest_index import current_index
 
 router = APIRouter(prefix='/suggest', tags=['suggest'])
 
 
+def suggest_query(name: str, limit: int = 10) -> Select:
+    """
+    The best scoring players whose full or comma name starts with `name` (normalized).
+    Two range scans of the covering key indexes, every key starting with `key` is in [key, upper).
+    """
+    key = normalize_name(name)
+    upper = key + '\U0010ffff'
+    columns = [
+        SuggestPlayer.id, SuggestPlayer.knsb_id, SuggestPlayer.fide_id, SuggestPlayer.comma_name,
+        SuggestPlayer.knsb_rating, SuggestPlayer.fide_rating, SuggestPlayer.score,
+    ]
+    ranking = [SuggestPlayer.score.desc(), SuggestPlayer.id]
+    by_key = [
+        select(*columns).where(column >= key, column < upper).order_by(*ranking).limit(limit).subquery()
+        for column in [SuggestPlayer.full_key, SuggestPlayer.comma_key]
+    ]
+    players = union(*(select(subquery) for subquery in by_key)).subquery()
+    return select(players).order_by(players.c.score.desc(), players.c.id).limit(limit)
+
+
 @router.get('', response_model=list[SuggestPlayerResponse])
-def suggest(session: SessionDep, name: Annotated[str, Query(max_length=50)]):
-    query = select(SuggestPlayer).where(
-        SuggestPlayer.full_name.like(f"{name}%") |
-        SuggestPlayer.comma_name.like(f"{name}%")
-    ).limit(10)
-    return session.execute(query).scalars()
+async def suggest(session: AsyncSessionDep, name: Annotated[str, Query(max_length=50)]):
+    index = current_index()
+    if index is not None:
+        return index.search(name, 10)
+
+    result = await session.execute(suggest_query(name))
+    return result.mappings().all()
 
 
 @router.get('/knsb/{knsb_id}', response_model=SuggestPlayerResponse)
-def suggest_knsb(session: SessionDep, knsb_id: Annotated[int, Path(gt=0)]):
+async def suggest_knsb(session: AsyncSessionDep, knsb_id: Annotated[int, Path(gt=0)]):
     query = select(SuggestPlayer).where(SuggestPlayer.knsb_id == knsb_id)
-    return session.execute(query).scalar_one_or_none()
+    result = await session.execute(query)
+    return result.scalar_one_or_none()
 
 
 @router.get('/fide/{fide_id}', response_model=SuggestPlayerResponse)
-def suggest_fide(session: SessionDep, fide_id: Annotated[int, Path(gt=0)]):
+async def suggest_fide(session: AsyncSessionDep, fide_id: Annotated[int, Path(gt=0)]):
     query = select(SuggestPlayer).where(SuggestPlayer.fide_id == fide_id)
-    return session.execute(query).scalar_one_or_none()
+    result = await session.execute(query)
+    return result.scalar_one_or_none()
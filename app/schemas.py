@@ -63,3 +63,5 @@ class SuggestPlayerResponse(BaseModel):
     knsb_id: int | None
     fide_id: int | None
     name: str = Field(validation_alias="comma_name")
+    knsb_rating: int | None
+    fide_rating: int | None
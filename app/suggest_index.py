@@ -0,0 +1,180 @@
+"""
+An in-memory index of `suggest_player`, so /suggest doesn't query the database on every keystroke.
+
+For both name orders there is a sorted array of the search keys of `suggest_player`
+(utf8, cut off at `KEY_BYTES`). The players starting with a prefix are one `searchsorted` range in it,
+the best scoring of them are suggested. Short prefixes match a large part of the players, so their
+best players are found when the index is built.
+The index is built at startup and again, in the background, when the data generation changes.
+"""
+import sqlite3
+import threading
+
+import numpy as np
+
+from app.database.connection import read_pragmas
+from app.database.meta import data_generation
+from app.database.normalize import normalize_name
+from config import settings
+
+# Longer prefixes are checked against the full key.
+KEY_BYTES = 32
+# The best `TOP_PLAYERS` for every prefix up to `TOP_BYTES` are precomputed.
+TOP_BYTES = 3
+TOP_PLAYERS = 10
+
+
+class Strings:
+    """A column of strings in one utf8 buffer, a lot smaller than a list of str."""
+    def __init__(self, strings: list[str]) -> None:
+        encoded = [string.encode('utf8') for string in strings]
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(string) for string in encoded], out=self.offsets[1:])
+        self.buffer = b''.join(encoded)
+
+    def __getitem__(self, i: int) -> str:
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].decode('utf8')
+
+
+class KeyColumn:
+    def __init__(self, keys: list[str], ranks: np.ndarray) -> None:
+        """`ranks` is the position of every row in the order of the suggestions."""
+        self.full_keys = Strings(keys)
+        cut_keys = np.array([key.encode('utf8')[:KEY_BYTES] for key in keys], dtype=f'S{KEY_BYTES}')
+        self.positions = np.argsort(cut_keys, kind='stable').astype(np.int32)
+        self.keys = cut_keys[self.positions]
+        self.top = self._top_players(ranks[self.positions])
+
+    def _top_players(self, ranks: np.ndarray) -> dict[bytes, np.ndarray]:
+        """The row positions of the best `TOP_PLAYERS` by prefix, for prefixes up to `TOP_BYTES`."""
+        top = {b'': self.positions[np.argsort(ranks)[:TOP_PLAYERS]]}
+        if len(self.keys) == 0:
+            # No groups, before the first ingest.
+            return top
+        for length in range(1, TOP_BYTES + 1):
+            # The keys are sorted, so every prefix is one group of consecutive keys.
+            prefixes = self.keys.astype(f'S{length}')
+            starts = np.flatnonzero(np.concatenate([[True], prefixes[1:] != prefixes[:-1]]))
+            sizes = np.diff(np.append(starts, len(prefixes)))
+            groups = np.repeat(np.arange(len(starts)), sizes)
+            by_rank = np.lexsort((ranks, groups))
+            # The first `TOP_PLAYERS` of every group.
+            best = self.positions[by_rank[np.arange(len(by_rank)) - starts[groups] < TOP_PLAYERS]]
+            bounds = np.cumsum(np.minimum(sizes, TOP_PLAYERS))[:-1]
+            top.update(zip(map(bytes, prefixes[starts]), np.split(best, bounds)))
+        return top
+
+    def starting_with(self, key: bytes) -> np.ndarray:
+        """The row positions of all names starting with `key`."""
+        cut = key[:KEY_BYTES]
+        start = np.searchsorted(self.keys, cut, 'left')
+        # 0xff never occurs in utf8, so this is past every key starting with `cut`.
+        stop = np.searchsorted(self.keys, cut + b'\xff' * (KEY_BYTES - len(cut)), 'right')
+
+        positions = self.positions[start:stop]
+        if len(key) > KEY_BYTES:
+            positions = np.array([position for position in positions
+                                  if self.full_keys[position].encode('utf8').startswith(key)], dtype=np.int32)
+        return positions
+
+    def best_starting_with(self, key: bytes, limit: int, ranks: np.ndarray) -> np.ndarray:
+        """The row positions of the best `limit` names starting with `key`, in no particular order."""
+        if len(key) <= TOP_BYTES and limit <= TOP_PLAYERS:
+            return self.top.get(key, np.empty(0, dtype=np.int32))[:limit]
+        positions = self.starting_with(key)
+        if len(positions) > limit:
+            positions = positions[np.argpartition(ranks[positions], limit - 1)[:limit]]
+        return positions
+
+
+class SuggestIndex:
+    def __init__(self, rows: list[tuple], generation: int) -> None:
+        """
+        `rows` are (id, knsb_id, fide_id, comma_name, comma_key, full_key,
+        knsb_rating, fide_rating, score) tuples.
+        """
+        self.generation = generation
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        # 0 for NULL, ids start at 1 and ratings are never 0.
+        self.knsb_ids = np.array([row[1] or 0 for row in rows], dtype=np.int64)
+        self.fide_ids = np.array([row[2] or 0 for row in rows], dtype=np.int64)
+        self.comma_names = Strings([row[3] for row in rows])
+        self.knsb_ratings = np.array([row[6] or 0 for row in rows], dtype=np.int16)
+        self.fide_ratings = np.array([row[7] or 0 for row in rows], dtype=np.int16)
+
+        # The order of the SQL query: score, then id.
+        scores = np.array([row[8] for row in rows], dtype=np.int32)
+        self.ranks = np.empty(len(rows), dtype=np.int32)
+        self.ranks[np.lexsort((self.ids, -scores))] = np.arange(len(rows))
+
+        self.comma_keys = KeyColumn([row[4] for row in rows], self.ranks)
+        self.full_keys = KeyColumn([row[5] for row in rows], self.ranks)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, name: str, limit: int) -> list[dict]:
+        """
+        The best scoring players whose full or comma name starts with `name`
+        (normalized, see `normalize_name`), in the order of `suggest_query`.
+        """
+        key = normalize_name(name).encode('utf8')
+        positions = np.union1d(self.full_keys.best_starting_with(key, limit, self.ranks),
+                               self.comma_keys.best_starting_with(key, limit, self.ranks))
+        positions = positions[np.argsort(self.ranks[positions])][:limit]
+
+        return [{
+            'id': int(self.ids[position]),
+            'knsb_id': int(self.knsb_ids[position]) or None,
+            'fide_id': int(self.fide_ids[position]) or None,
+            'comma_name': self.comma_names[position],
+            'knsb_rating': int(self.knsb_ratings[position]) or None,
+            'fide_rating': int(self.fide_ratings[position]) or None,
+        } for position in positions]
+
+
+def build_index() -> SuggestIndex:
+    # The generation before reading, so a bump during the build triggers another one.
+    generation = data_generation()
+    con = sqlite3.connect(f'file:{settings.database_path}?mode=ro', uri=True)
+    try:
+        read_pragmas(con)
+        rows = con.execute("""
+            SELECT id, knsb_id, fide_id, comma_name, comma_key, full_key, knsb_rating, fide_rating, score
+            FROM suggest_player;
+        """).fetchall()
+    finally:
+        con.close()
+    return SuggestIndex(rows, generation)
+
+
+_index: SuggestIndex | None = None
+_reloading = threading.Lock()
+
+
+def load_index() -> None:
+    """Builds the index, the API serves /suggest from it from then on."""
+    global _index
+    _index = build_index()
+
+
+def _reload() -> None:
+    global _index
+    try:
+        _index = build_index()
+    finally:
+        _reloading.release()
+
+
+def current_index() -> SuggestIndex | None:
+    """
+    The index, None if it was never loaded or if it's outdated. When the data generation changed,
+    a new index is built in the background, until it's done /suggest queries the database,
+    so its responses match their ETag (see app/http_cache.py).
+    """
+    index = _index
+    if index is not None and index.generation != data_generation():
+        if _reloading.acquire(blocking=False):
+            threading.Thread(target=_reload, daemon=True).start()
+        return None
+    return index
@@ -0,0 +1,65 @@
+"""
+Compares the throughput of the async read endpoints with the sync handlers they replaced,
+under concurrent requests. Needs a filled instance/database.db. Run from the repository root:
+
+    python -m benchmarks.async_reads
+
+Keep --concurrency below the sync connection pool (5 + 10 overflow): above it, the sync handlers
+hold every threadpool thread while waiting for a connection and time out.
+"""
+import argparse
+import asyncio
+import random
+import sqlite3
+import time
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from app.main import app
+from app.models import KnsbPlayer, SessionDep
+from app.schemas import KnsbPlayerResponse
+
+sync_app = FastAPI()
+
+
+@sync_app.get('/knsb/players/{knsb_id}', response_model=KnsbPlayerResponse)
+def get_player(session: SessionDep, knsb_id: int):
+    player = session.get(KnsbPlayer, knsb_id)
+    if player:
+        return player
+    raise HTTPException(404)
+
+
+async def throughput(target: FastAPI, ids: list[int], concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=target)
+    async with httpx.AsyncClient(transport=transport, base_url='http://benchmark') as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request(knsb_id: int) -> None:
+            async with semaphore:
+                response = await client.get(f'/knsb/players/{knsb_id}')
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(request(i) for i in ids))
+        return len(ids) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=10)
+    args = parser.parse_args()
+
+    con = sqlite3.connect('instance/database.db')
+    knsb_ids = [row[0] for row in con.execute("SELECT knsb_id FROM knsb_player")]
+    ids = random.choices(knsb_ids, k=args.requests)
+
+    for name, target in [('sync', sync_app), ('async', app)]:
+        rate = asyncio.run(throughput(target, ids, args.concurrency))
+        print(f"{name:>5}: {rate:8.0f} requests/s")
+
+
+if __name__ == '__main__':
+    main()
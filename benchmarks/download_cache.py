@@ -0,0 +1,124 @@
+"""
+Runs app/database/download_cache.py against a local HTTP stand-in of the rating list sites, in a
+temporary cache directory: a first download, revalidation with ETag and with Last-Modified (both
+answered with 304), a changed list, and the offline mode. Every step is checked, and the time of
+a cold and a revalidated fetch is printed. Run from the repository root:
+
+    python -m benchmarks.download_cache --mb 20
+"""
+import argparse
+import email.utils
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+directory = tempfile.mkdtemp()
+os.environ['DOWNLOAD_CACHE_DIR'] = os.path.join(directory, 'cache')
+
+from app.database.download_cache import (OfflineError,  # noqa: E402
+                                         _read_index, cached_path, fetch)
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """
+    Serves `files` by path. /etag/... answers If-None-Match, /modified/... only has a Last-Modified
+    and answers If-Modified-Since. Every request is logged in `requests` as (path, status, body bytes).
+    """
+    files: dict[str, bytes] = {}
+    modified: dict[str, float] = {}
+    requests: list[tuple[str, int, int]] = []
+
+    def do_GET(self):
+        content = self.files.get(self.path)
+        if content is None:
+            return self.reply(404)
+
+        if self.path.startswith('/etag/'):
+            etag = '"' + hashlib.sha256(content).hexdigest()[:16] + '"'
+            if self.headers.get('If-None-Match') == etag:
+                return self.reply(304, headers={'ETag': etag})
+            return self.reply(200, content, {'ETag': etag})
+
+        last_modified = email.utils.formatdate(self.modified[self.path], usegmt=True)
+        since = self.headers.get('If-Modified-Since')
+        if since and email.utils.parsedate_to_datetime(since).timestamp() >= int(self.modified[self.path]):
+            return self.reply(304, headers={'Last-Modified': last_modified})
+        return self.reply(200, content, {'Last-Modified': last_modified})
+
+    def reply(self, status: int, body: bytes = b'', headers: dict[str, str] | None = None):
+        self.requests.append((self.path, status, len(body)))
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed(function, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = function(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mb', type=int, default=20)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+
+    content = os.urandom(args.mb * 2**20)
+    StandIn.files = {'/etag/standard.zip': content, '/modified/rapid.zip': content[:2**20]}
+    StandIn.modified = {'/modified/rapid.zip': time.time() - 3600}
+    requests = StandIn.requests
+
+    # A first download stores the list, a second one is revalidated and gets a 304.
+    cold, path = timed(cached_path, f'{base}/etag/standard.zip')
+    assert path.read_bytes() == content and path.suffix == '.zip'
+    warm, again = timed(cached_path, f'{base}/etag/standard.zip')
+    assert again == path and requests[-1] == ('/etag/standard.zip', 304, 0)
+    print(f"{args.mb} MiB list: first download {cold:7.1f} ms, revalidated (304) {warm:6.1f} ms")
+
+    # The same with only a Last-Modified header.
+    fetch(f'{base}/modified/rapid.zip')
+    assert fetch(f'{base}/modified/rapid.zip') == content[:2**20]
+    assert requests[-1] == ('/modified/rapid.zip', 304, 0)
+
+    # A changed list is downloaded again and its old file removed.
+    StandIn.files['/etag/standard.zip'] = content[::-1]
+    changed = cached_path(f'{base}/etag/standard.zip')
+    assert changed != path and changed.read_bytes() == content[::-1] and not path.exists()
+    assert requests[-1] == ('/etag/standard.zip', 200, len(content))
+
+    # Offline only the cache is used, without a request.
+    count = len(requests)
+    assert cached_path(f'{base}/etag/standard.zip', offline=True) == changed
+    assert len(requests) == count
+    # Not cached at all, and in the index but with its file gone.
+    (changed.parent / _read_index()[f'{base}/modified/rapid.zip']['object']).unlink()
+    for url in [f'{base}/etag/blitz.zip', f'{base}/modified/rapid.zip']:
+        try:
+            cached_path(url, offline=True)
+        except OfflineError as e:
+            print(f"offline: {e}")
+        else:
+            raise AssertionError(f"{url} shouldn't be available offline")
+    assert len(requests) == count
+
+    print(f"{len(requests)} requests to the stand-in, all checks passed.")
+    server.shutdown()
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Compares the player and rating endpoints through the response models (before) and through
+the orjson fast path of app/fast_json.py (after), on synthetic tables in a temporary database.
+Every response of both paths is checked to be byte for byte the same. The app is called
+directly, without a server. Run from the repository root:
+
+    python -m benchmarks.fast_json --rows 100000
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import orjson
+import pandas as pd
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+directory = tempfile.mkdtemp()
+os.environ['DATABASE_PATH'] = os.path.join(directory, 'database.db')
+
+from app.database.bulk import load_table  # noqa: E402
+from app.database.connection import connect_writer  # noqa: E402
+from app.database.search import create_player_search  # noqa: E402
+from app.fast_json import response_columns  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import FidePlayer, async_engine, engine  # noqa: E402
+from app.schemas import FidePlayerResponse  # noqa: E402
+from benchmarks.player_search import synthetic_players  # noqa: E402
+from config import settings  # noqa: E402
+
+DATE = '2025-01-01'
+
+
+async def get(path: str, query: str) -> tuple[int, bytes]:
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'headers': [], 'client': ('127.0.0.1', 0), 'server': ('test', 80),
+    }
+    response = {'body': b''}
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        else:
+            response['body'] += message.get('body', b'')
+
+    await app(scope, receive, send)
+    return response['status'], response['body']
+
+
+async def responses(requests: list[tuple[str, str]], fast_json: bool) -> tuple[list[bytes], np.ndarray]:
+    settings.fast_json = fast_json
+    bodies = []
+    result = []
+    for path, query in requests:
+        start = time.perf_counter()
+        status, body = await get(path, query)
+        result.append(time.perf_counter() - start)
+        assert status == 200, (path, query, status, body)
+        bodies.append(body)
+    return bodies, np.array(result) * 1000
+
+
+def synthetic_tables(rows: int) -> None:
+    rng = np.random.default_rng(0)
+    players = synthetic_players(rows).assign(birthyear=rng.integers(1940, 2015, rows))
+    ratings = pd.DataFrame({
+        'date': DATE,
+        'active': True,
+        'standard_rating': rng.integers(1000, 2800, rows),
+        'standard_games': rng.integers(0, 40, rows),
+        'standard_k': 20,
+    }, index=players.index)
+    knsb_players = players.drop(columns='active').rename_axis('knsb_id')
+    knsb_ratings = ratings[['date', 'standard_rating', 'standard_games']].rename_axis('knsb_id')
+
+    con = connect_writer()
+    load_table(con, 'fide_player', players)
+    load_table(con, 'fide_rating', ratings)
+    load_table(con, 'knsb_player', knsb_players)
+    load_table(con, 'knsb_rating', knsb_ratings)
+    create_player_search(con)
+    con.close()
+
+
+def encoding(rows: int, repeat: int) -> None:
+    """Only the encoding of `rows` players, as the search endpoint does it."""
+    keys, columns = response_columns(FidePlayerResponse, FidePlayer)
+    with Session(engine) as session:
+        players = session.execute(select(FidePlayer).limit(rows)).scalars().all()
+        tuples = session.execute(select(*columns).limit(rows)).all()
+
+    adapter = TypeAdapter(list[FidePlayerResponse])
+    start = time.perf_counter()
+    for _ in range(repeat):
+        before = adapter.dump_json(adapter.validate_python(players, from_attributes=True))
+    slow = (time.perf_counter() - start) / repeat * 1000
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        after = orjson.dumps([dict(zip(keys, row)) for row in tuples])
+    fast = (time.perf_counter() - start) / repeat * 1000
+
+    assert before == after
+    print(f"encoding {rows} players: {slow:6.3f} -> {fast:6.3f} ms")
+
+
+async def run(args: argparse.Namespace) -> None:
+    rng = np.random.default_rng(1)
+    ids = rng.choice(args.rows, args.requests, replace=False) + 1_000_000
+    names = synthetic_players(args.rows).loc[ids, 'name'].str[:5].tolist()
+    endpoints = {
+        'player': [(f'/{fed}/players/{i}', '') for i in ids for fed in ['fide', 'knsb']],
+        'rating': [(f'/{fed}/ratings', f'{fed}_id={i}&date={DATE}') for i in ids for fed in ['fide', 'knsb']],
+        'search': [(f'/{fed}/players/search', f'name={name}&limit=50') for name in names for fed in ['fide', 'knsb']],
+    }
+
+    for name, requests in endpoints.items():
+        # Once first, so both are measured with a warm page cache.
+        await responses(requests, False)
+        before, slow = await responses(requests, False)
+        after, fast = await responses(requests, True)
+        assert before == after, name
+        print(f"{name:>6}: p50 {np.percentile(slow, 50):6.3f} -> {np.percentile(fast, 50):6.3f} ms, "
+              f"p99 {np.percentile(slow, 99):6.3f} -> {np.percentile(fast, 99):6.3f} ms "
+              f"({len(requests)} requests, identical bodies)")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+
+    synthetic_tables(args.rows)
+    encoding(50, 1000)
+    asyncio.run(run(args))
+    engine.dispose()
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
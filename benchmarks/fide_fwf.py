@@ -0,0 +1,100 @@
+"""
+Compares the fixed width parser in app/database/fide/fwf.py with pandas.read_fwf
+on a synthetic FIDE rating list. Run from the repository root:
+
+    python -m benchmarks.fide_fwf --rows 1200000
+"""
+import argparse
+import io
+import random
+import time
+import tracemalloc
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from app.database.fide.download_list import read_rating_zip
+from app.database.meta import RatingPeriod
+
+WIDTHS = [15, 61, 4, 4, 5, 5, 15, 4, 6, 4, 3, 6, 5]
+
+
+def synthetic_list(rows: int, period: RatingPeriod) -> bytes:
+    """A zipped rating list in the format of e.g. standard_oct25frl.zip."""
+    rng = random.Random(0)
+    header = ['ID Number', 'Name', 'Fed', 'Sex', 'Tit', 'WTit', 'OTit', 'FOA',
+              period.as_date().strftime("%b%y").upper(), 'Gms', 'K', 'B-day', 'Flag']
+
+    lines = [''.join(name.ljust(width) for name, width in zip(header, WIDTHS)).rstrip()]
+    for i in range(rows):
+        rating = rng.randint(1000, 2800) if rng.random() < 0.9 else ''
+        values = [
+            1000000 + i, f"Player{i}, Name{rng.randint(0, 999)}", rng.choice(['NED', 'GER', 'BEL']),
+            rng.choice('MF'), rng.choice(['', '', 'GM', 'FM']), rng.choice(['', 'WGM']), '', '',
+            rating, rng.randint(0, 9), rng.choice([10, 20, 40]), rng.choice([0, rng.randint(1940, 2015)]),
+            rng.choice(['', 'i', 'wi', 'w'])
+        ]
+        lines.append(''.join(str(value).ljust(width) for value, width in zip(values, WIDTHS)).rstrip())
+
+    content = io.BytesIO()
+    with zipfile.ZipFile(content, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('list.txt', '\r\n'.join(lines) + '\r\n')
+    return content.getvalue()
+
+
+def read_rating_zip_pandas(content: bytes, period: RatingPeriod) -> pd.DataFrame:
+    """The previous implementation of `read_rating_zip`."""
+    rating_column = period.as_date().strftime("%b%y").upper()
+    Int = pd.Int64Dtype()
+
+    df = pd.read_fwf(io.BytesIO(content), compression='zip', na_values=['', 0], widths=WIDTHS)
+    ratings = pd.DataFrame(dict(
+        fide_id=df['ID Number'],
+        date=period.isoformat(),
+        title=df['Tit'],
+        woman_title=df['WTit'],
+        other_titles=df['OTit'],
+        rating=df[rating_column].astype(Int),
+        games=df['Gms'].astype(Int),
+        k=df['K'].astype(Int),
+        active=~df['Flag'].str.contains('i', regex=False, na=False)
+    ))
+    ratings.set_index('fide_id', inplace=True)
+    return ratings
+
+
+def measure(name: str, read, content: bytes, period: RatingPeriod) -> pd.DataFrame:
+    start = time.perf_counter()
+    df = read(content, period)
+    seconds = time.perf_counter() - start
+
+    # Separately, tracing slows everything down.
+    tracemalloc.start()
+    read(content, period)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:>8}: {seconds:6.2f} s, peak {peak / 2**20:7.1f} MiB")
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_200_000)
+    args = parser.parse_args()
+
+    period = RatingPeriod(2025, 10)
+    content = synthetic_list(args.rows, period)
+    print(f"{args.rows} rows, {len(content) / 2**20:.1f} MiB zipped")
+
+    expected = measure('read_fwf', read_rating_zip_pandas, content, period)
+    actual = measure('fwf', read_rating_zip, content, period)
+
+    for column in expected.columns:
+        if not np.array_equal(expected[column].astype(object).fillna(0), actual[column].astype(object).fillna(0)):
+            print(f"Column {column} differs!")
+    assert (expected.index == actual.index).all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Compares the conversions around a rating calculation of a 50 game list: the API GameList to the
+domain one (model_dump and dacite before, app/rating/verification/convert.py after), and the domain
+ListCalculation to the API one (asdict and model_validate before, convert.py after).
+The player lookups are left out, only the conversion is measured. Run from the repository root:
+
+    python -m benchmarks.game_list_convert --games 50
+"""
+import argparse
+import time
+from dataclasses import asdict
+from enum import Enum
+
+from app.rating.domain import models as domain
+from app.rating.period import RatingPeriod
+from app.rating.verification import models as api
+from app.rating.verification.convert import (to_api_calculation,
+                                             to_domain_game_list)
+
+try:
+    # Only for the comparison, the app doesn't use it anymore.
+    from dacite import Config, from_dict
+except ImportError:
+    from_dict = None
+
+
+def game_list(games: int) -> api.GameList:
+    return api.GameList.model_validate({
+        'player': {'knsb_id': 1},
+        'game_type': 'STANDARD',
+        'period': {'month': 11, 'year': 2025},
+        'games': [{'opponent': {'knsb_id': i + 2, 'fide_id': 1000 + i},
+                   'result': [0, 0.5, 1][i % 3],
+                   'period': {'month': 10, 'year': 2025}} for i in range(games)],
+    })
+
+
+def calculation(games: int) -> domain.ListCalculation:
+    def rating(value: int) -> domain.RatingResult:
+        return domain.RatingResult(value, 50.0, domain.RatingSource.KS, RatingPeriod(10, 2025))
+
+    results = [
+        domain.GameCalculation(
+            domain.Game(domain.Player(i + 2, 1000 + i), domain.Result.DRAW, RatingPeriod(10, 2025)),
+            rating(1800), rating(1700 + i), 0.64, 25.0, -3.5,
+        ) if i % 10 else
+        domain.GameDoesNotCount(
+            domain.Game(domain.Player(i + 2, None), domain.Result.WIN, RatingPeriod(10, 2025)), "Geen rating"
+        )
+        for i in range(games)
+    ]
+    return domain.ListCalculation(rating(1800), rating(1820), games, 20, 0, domain.LprLimitation(1900, None, None), results)
+
+
+def to_player(player: api.Player) -> domain.Player:
+    return domain.Player(player.knsb_id, player.fide_id)
+
+
+def per_call(function, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--games', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    incoming = game_list(args.games)
+    outgoing = calculation(args.games)
+
+    new_in = to_domain_game_list(incoming, to_player)
+    new_out = to_api_calculation(outgoing)
+    old_out = api.ListCalculation.model_validate(asdict(outgoing))
+    assert new_out.model_dump_json() == old_out.model_dump_json()
+
+    if from_dict is not None:
+        config = Config(cast=[Enum], type_hooks={domain.Player: lambda player: to_player(api.Player(**player))})
+        old_in = from_dict(domain.GameList, incoming.model_dump(), config=config)
+        assert old_in == new_in
+        before = per_call(lambda: from_dict(domain.GameList, incoming.model_dump(), config=config), args.repeat)
+        after = per_call(lambda: to_domain_game_list(incoming, to_player), args.repeat)
+        print(f"GameList in:         {before:6.3f} -> {after:6.3f} ms")
+    else:
+        print("GameList in: dacite isn't installed, nothing to compare with.")
+
+    before = per_call(lambda: api.ListCalculation.model_validate(asdict(outgoing)), args.repeat)
+    after = per_call(lambda: to_api_calculation(outgoing), args.repeat)
+    print(f"ListCalculation out: {before:6.3f} -> {after:6.3f} ms")
+
+    before = per_call(lambda: api.ListCalculation.model_validate(asdict(outgoing)).model_dump_json(), args.repeat)
+    after = per_call(lambda: to_api_calculation(outgoing).model_dump_json(), args.repeat)
+    print(f"  including JSON:    {before:6.3f} -> {after:6.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
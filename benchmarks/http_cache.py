@@ -0,0 +1,88 @@
+"""
+Compares GET /fide/players/{fide_id} through the endpoint (the first request), from the response
+cache (the same request again) and as 304 (a request with the ETag), on a synthetic fide_player
+table in a temporary database. The app is called directly, without a server.
+Run from the repository root:
+
+    python -m benchmarks.http_cache --rows 100000
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+directory = tempfile.mkdtemp()
+os.environ['DATABASE_PATH'] = os.path.join(directory, 'database.db')
+os.environ['RESPONSE_CACHE_MB'] = '64'
+
+from app.database.bulk import load_table  # noqa: E402
+from app.database.connection import connect_writer  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import async_engine, engine  # noqa: E402
+from benchmarks.latency import report  # noqa: E402
+from benchmarks.player_search import synthetic_players  # noqa: E402
+
+
+async def get(path: str, headers: list[tuple[bytes, bytes]]) -> tuple[int, dict]:
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+        'root_path': '', 'headers': headers, 'client': ('127.0.0.1', 0), 'server': ('test', 80),
+    }
+    response = {}
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = dict(message['headers'])
+
+    await app(scope, receive, send)
+    return response['status'], response['headers']
+
+
+async def latencies(paths: list[str], etag: bytes | None = None) -> np.ndarray:
+    headers = [(b'if-none-match', etag)] if etag else []
+    result = []
+    for path in paths:
+        start = time.perf_counter()
+        await get(path, headers)
+        result.append(time.perf_counter() - start)
+    return np.array(result) * 1000
+
+
+async def run(args: argparse.Namespace) -> None:
+    ids = np.random.default_rng(1).choice(args.rows, args.requests, replace=False) + 1_000_000
+    paths = [f'/fide/players/{fide_id}' for fide_id in ids]
+
+    status, headers = await get(paths[0], [])
+    assert status == 200
+    report('endpoint', await latencies(paths[1:]))
+    report('memory', await latencies(paths[1:]))
+    report('304', await latencies(paths[1:], headers[b'etag']))
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    con = connect_writer()
+    load_table(con, 'fide_player', synthetic_players(args.rows).assign(birthyear=1990))
+    con.close()
+
+    asyncio.run(run(args))
+    engine.dispose()
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Measures the read latency of the API while the ingest writes a large table.
+Works on a copy of instance/database.db. Run from the repository root:
+
+    python -m benchmarks.ingest_reads
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+directory = tempfile.mkdtemp()
+os.environ['DATABASE_PATH'] = os.path.join(directory, 'database.db')
+shutil.copy('instance/database.db', os.environ['DATABASE_PATH'])
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database.bulk import load_table  # noqa: E402
+from app.database.connection import connect_writer  # noqa: E402
+from app.main import app  # noqa: E402
+from benchmarks.latency import report  # noqa: E402
+
+
+def latencies(client: TestClient, ids: list[int], stop: threading.Event | None = None) -> np.ndarray:
+    result = []
+    for knsb_id in ids:
+        if stop is not None and stop.is_set():
+            break
+        start = time.perf_counter()
+        client.get(f'/knsb/players/{knsb_id}').raise_for_status()
+        result.append(time.perf_counter() - start)
+    return np.array(result) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    con = sqlite3.connect(os.environ['DATABASE_PATH'])
+    knsb_ids = [row[0] for row in con.execute("SELECT knsb_id FROM knsb_player")]
+    ids = random.choices(knsb_ids, k=args.requests)
+
+    # A month that doesn't exist in the copy, so the rows are all inserted.
+    df = pd.DataFrame({
+        'fide_id': np.arange(args.rows),
+        'date': '1990-01-01',
+        'standard_rating': np.random.randint(1000, 2800, args.rows),
+    }).set_index('fide_id')
+
+    with TestClient(app) as client:
+        report('idle', latencies(client, ids))
+
+        stop = threading.Event()
+        def ingest():
+            start = time.perf_counter()
+            load_table(connect_writer(), 'fide_rating', df)
+            print(f"Wrote {args.rows} rows in {time.perf_counter() - start:.1f} s.")
+            stop.set()
+
+        writer = threading.Thread(target=ingest)
+        writer.start()
+        report('ingest', latencies(client, ids * 100, stop))
+        writer.join()
+
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+"""
+Reporting of the latencies the benchmarks measure.
+"""
+import numpy as np
+
+
+def report(name: str, ms: np.ndarray, unit: str = 'requests') -> None:
+    """Prints the percentiles of `ms`, the latencies in milliseconds of as many `unit`."""
+    print(f"{name:>8}: p50 {np.percentile(ms, 50):7.3f} ms, p99 {np.percentile(ms, 99):7.3f} ms, "
+          f"max {ms.max():7.3f} ms, {ms.size / ms.sum() * 1000:7.0f} {unit}/s ({ms.size} {unit})")
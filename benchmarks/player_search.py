@@ -0,0 +1,142 @@
+"""
+Compares the latency of /fide/players/search with LIKE (before) and with the FTS5
+trigram table (after), on a synthetic fide_player table in a temporary database.
+Also measures how close the ranking is to ordering every match. The first version ordered only
+the first 500 matches in rowid order (player id), the search tables now return the shortest names
+first. Run from the repository root:
+
+    python -m benchmarks.player_search --rows 1000000
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+directory = tempfile.mkdtemp()
+os.environ['DATABASE_PATH'] = os.path.join(directory, 'database.db')
+
+from sqlalchemy import func, select, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database.bulk import load_table  # noqa: E402
+from app.database.connection import connect_writer  # noqa: E402
+from app.database.search import (create_player_search,  # noqa: E402
+                                 player_search_query)
+from app.models import FidePlayer, engine  # noqa: E402
+from benchmarks.latency import report  # noqa: E402
+
+FIRST_NAMES = ['Jan', 'Piet', 'Magnus', 'Anish', 'Hikaru', 'Anna', 'Olga', 'Jörg', 'Luis', 'Wei', 'Judit', 'Ding']
+SYLLABLES = ['jan', 'berg', 'mul', 'kow', 'smit', 'nak', 'car', 'gir', 'dub', 'iva', 'sen', 'ler', 'ski', 'ova', 'ic', 'ez']
+
+
+def synthetic_players(rows: int) -> pd.DataFrame:
+    rng = random.Random(0)
+    names = [
+        ''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize() + ', ' + rng.choice(FIRST_NAMES)
+        for _ in range(rows)
+    ]
+    return pd.DataFrame({
+        'fide_id': np.arange(rows) + 1_000_000,
+        'name': names,
+        'fed': 'NED',
+        'sex': 'M',
+        'active': True,
+    }).set_index('fide_id')
+
+
+def latencies(session: Session, statements: list) -> np.ndarray:
+    result = []
+    for statement in statements:
+        start = time.perf_counter()
+        session.execute(statement).scalars().all()
+        result.append(time.perf_counter() - start)
+    return np.array(result) * 1000
+
+
+def rank_key(name: str, found: str) -> tuple[bool, int]:
+    """What the ranking orders by: names starting with `name` first, then the shortest."""
+    return not found.lower().startswith(name.lower()), len(found)
+
+
+def recall(session: Session, names: list[str], statements: list, limit: int) -> tuple[float, float]:
+    """
+    The mean fraction of the best `limit` ranks the statements find, and the fraction of
+    searches where they're all found. Equal ranks are interchangeable, so ranks are compared,
+    the best ones by ordering every match with LIKE.
+    """
+    fractions = []
+    for name, statement in zip(names, statements):
+        best = session.execute(
+            select(FidePlayer.name).where(FidePlayer.name.contains(name, autoescape=True))
+            .order_by(func.instr(func.lower(FidePlayer.name), func.lower(name)) != 1, func.length(FidePlayer.name))
+            .limit(limit)
+        ).scalars().all()
+        if not best:
+            continue
+        found = [player.name for player in session.execute(statement).scalars().all()]
+        expected = pd.Series([rank_key(name, player) for player in best]).value_counts()
+        actual = pd.Series([rank_key(name, player) for player in found], dtype=object).value_counts()
+        fractions.append(np.minimum(expected, actual.reindex(expected.index, fill_value=0)).sum() / len(best))
+    fractions = np.array(fractions)
+    return fractions.mean(), (fractions == 1).mean()
+
+
+def first_candidates_query(name: str, limit: int):
+    """The ranking of the first version: only the first 500 matches, by player id, are ordered."""
+    statement = text("""
+        SELECT fide_player.* FROM (
+            SELECT rowid & 4294967295 AS id FROM fide_player_search WHERE fide_player_search MATCH :phrase
+            ORDER BY id LIMIT 500
+        ) AS found
+        JOIN fide_player ON fide_player.fide_id = found.id
+        ORDER BY instr(lower(fide_player.name), lower(:name)) = 1 DESC, length(fide_player.name)
+        LIMIT :limit
+    """).bindparams(phrase=f'"{name}"', name=name, limit=limit)
+    return select(FidePlayer).from_statement(statement)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--searches', type=int, default=500)
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    players = synthetic_players(args.rows)
+    # Building the search table afterwards is a lot faster than through the triggers.
+    con = connect_writer()
+    load_table(con, 'fide_player', players)
+    create_player_search(con)
+
+    # What a user types: a part of a name, 3 to 10 characters. A few don't exist.
+    rng = random.Random(1)
+    names = []
+    for name in rng.choices(players['name'].tolist(), k=args.searches):
+        start = rng.randrange(len(name) - 2)
+        names.append(name[start:start + rng.randint(3, 10)].lower())
+    names[::10] = ['xyz' + name for name in names[::10]]
+
+    before = [select(FidePlayer).where(FidePlayer.name.contains(name, autoescape=True)).limit(args.limit)
+              for name in names]
+    after = [player_search_query(FidePlayer, name, args.limit) for name in names]
+
+    with Session(engine) as session:
+        report('LIKE', latencies(session, before), 'searches')
+        report('FTS5', latencies(session, after), 'searches')
+
+        for label, statements in [('first candidates', [first_candidates_query(name, args.limit) for name in names]),
+                                  ('FTS5', after)]:
+            mean, complete = recall(session, names, statements, args.limit)
+            print(f"{label:>16}: {mean:6.1%} of the best ranks found, all of them in {complete:6.1%} of the searches")
+
+    engine.dispose()
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Measures the domain objects of the rating engine: their size, the memory of a large batch of
+game lists, period lookups in a dict, and a batch calculation (`calculate_new_ratings`) with its
+peak memory and the repository lookups it does. The repository is synthetic and in memory, so
+only the engine is measured. Run from the repository root, on two commits to compare:
+
+    python -m benchmarks.rating_objects --lists 500 --games 50
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+directory = tempfile.mkdtemp()
+os.environ['DATABASE_PATH'] = os.path.join(directory, 'database.db')
+
+from app.rating.cache import CachingRepository  # noqa: E402
+from app.rating.domain.models import (Game, GameList, GameType,  # noqa: E402
+                                      Player, RatingContext, RatingResult,
+                                      RatingSource, Result)
+from app.rating.domain.rules.calculate import \
+    calculate_new_ratings  # noqa: E402
+from app.rating.period import RatingPeriod  # noqa: E402
+
+PERIOD = RatingPeriod(11, 2025)
+
+
+class SyntheticRepository:
+    """Players 1 to `players`, with a computed rating in every period."""
+    def __init__(self, players: int) -> None:
+        self.players = players
+
+    def get_knsb(self, knsb_id: int):
+        return SimpleNamespace(knsb_id=knsb_id, fide_id=knsb_id + 10**6, fed='NED', birthyear=1950 + knsb_id % 60)
+
+    def get_fide(self, fide_id: int):
+        return SimpleNamespace(fide_id=fide_id, birthyear=1950 + fide_id % 60)
+
+    def get_knsb_from_fide(self, fide_id: int):
+        return self.get_knsb(fide_id - 10**6)
+
+    def get_knsb_rating(self, knsb_id: int, period: RatingPeriod):
+        return None
+
+    def get_fide_rating(self, fide_id: int, period: RatingPeriod):
+        return None
+
+    def get_applicable_rating(self, knsb_id: int, period: RatingPeriod, game_type: str, for_opponent: bool):
+        return SimpleNamespace(rating=1200 + knsb_id * 7919 % 1400, nv_value=50.0, source='knsb-standard')
+
+    def has_played_game(self, knsb_id: int) -> bool:
+        return True
+
+
+def game_lists(lists: int, games: int, players: int) -> list[GameList]:
+    rng = random.Random(0)
+    periods = [RatingPeriod(month, 2025) for month in range(1, 12)]
+    return [
+        GameList(
+            Player(i % players + 1, None), GameType.STANDARD, PERIOD,
+            [Game(Player(rng.randint(1, players), None), rng.choice(list(Result)), rng.choice(periods))
+             for _ in range(games)],
+        )
+        for i in range(lists)
+    ]
+
+
+def size(obj: object) -> int:
+    """The instance with its `__dict__`, if it has one."""
+    return sys.getsizeof(obj) + (sys.getsizeof(vars(obj)) if hasattr(obj, '__dict__') else 0)
+
+
+def sizes() -> None:
+    objects = {
+        'RatingPeriod': PERIOD,
+        'Player': Player(1, 2),
+        'Game': Game(Player(1, 2), Result.WIN, PERIOD),
+        'RatingContext': RatingContext(GameType.STANDARD, PERIOD),
+        'RatingResult': RatingResult(1800, 50.0, RatingSource.KS, PERIOD),
+    }
+    for name, obj in objects.items():
+        print(f"{name:>14}: {size(obj):4} bytes")
+
+
+def build(args: argparse.Namespace) -> None:
+    tracemalloc.start()
+    lists = game_lists(args.lists, args.games, args.players)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{args.lists} lists of {args.games} games: {current / 2**20:6.2f} MiB")
+    del lists
+
+
+def period_keys(repeat: int) -> None:
+    periods = [RatingPeriod(month, year) for year in range(2000, 2026) for month in range(1, 13)]
+    table = {period: i for i, period in enumerate(periods)}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for period in periods:
+            table[period]
+    seconds = time.perf_counter() - start
+    print(f"period dict lookup: {seconds / (repeat * len(periods)) * 1e9:6.1f} ns")
+
+
+def calculation(args: argparse.Namespace) -> None:
+    lists = game_lists(args.lists, args.games, args.players)
+    repo = CachingRepository(SyntheticRepository(args.players))
+
+    tracemalloc.start()
+    calculate_new_ratings(lists, repo)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = []
+    for _ in range(args.repeat):
+        repo = CachingRepository(SyntheticRepository(args.players))
+        start = time.perf_counter()
+        calculate_new_ratings(lists, repo)
+        timings.append(time.perf_counter() - start)
+
+    lookups = sum(stats.hits + stats.misses for stats in repo.stats.values())
+    print(f"calculate_new_ratings: {min(timings) * 1000:7.1f} ms, peak {peak / 2**20:6.2f} MiB, "
+          f"{lookups} repository lookups")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lists', type=int, default=500)
+    parser.add_argument('--games', type=int, default=50)
+    parser.add_argument('--players', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    sizes()
+    build(args)
+    period_keys(2000)
+    calculation(args)
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
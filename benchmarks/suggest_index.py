@@ -0,0 +1,100 @@
+"""
+Compares /suggest through SQL (range scans of the key indexes) with the in-memory
+index of app/suggest_index.py,
+on a synthetic suggest_player table in a temporary database. Run from the repository root:
+
+    python -m benchmarks.suggest_index --rows 1000000
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+directory = tempfile.mkdtemp()
+os.environ['DATABASE_PATH'] = os.path.join(directory, 'database.db')
+
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database.connection import connect_writer  # noqa: E402
+from app.database.normalize import normalize_name  # noqa: E402
+from app.models import engine  # noqa: E402
+from app.routers.suggest import suggest_query  # noqa: E402
+from app.suggest_index import build_index  # noqa: E402
+from benchmarks.latency import report  # noqa: E402
+from benchmarks.player_search import synthetic_players  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--searches', type=int, default=2000)
+    args = parser.parse_args()
+
+    comma_names = synthetic_players(args.rows)['name'].tolist()
+    full_names = [' '.join(reversed(name.split(', '))) for name in comma_names]
+    # Scores like app/database/suggest.sql: Dutch, active and rating.
+    rng = np.random.default_rng(0)
+    knsb_ratings = rng.integers(1000, 2600, args.rows)
+    scores = 100000 * (rng.random(args.rows) < 0.3) + 10000 * (rng.random(args.rows) < 0.7) + knsb_ratings
+    con = connect_writer()
+    con.executemany(
+        """
+        INSERT INTO suggest_player (fide_id, comma_name, full_name, comma_key, full_key, knsb_rating, score)
+        VALUES (?, ?, ?, ?, ?, ?, ?);
+        """,
+        zip(range(1, args.rows + 1), comma_names, full_names,
+            map(normalize_name, comma_names), map(normalize_name, full_names),
+            knsb_ratings.tolist(), scores.tolist())
+    )
+    # The covering key indexes of app/database/suggest.sql.
+    for key in ['comma_key', 'full_key']:
+        con.execute(f"""
+            CREATE INDEX s_{key}_idx ON suggest_player (
+                {key}, score, id, knsb_id, fide_id, comma_name, knsb_rating, fide_rating
+            );
+        """)
+    con.commit()
+
+    start = time.perf_counter()
+    index = build_index()
+    seconds = time.perf_counter() - start
+
+    # Separately, tracing slows the build down.
+    tracemalloc.start()
+    traced = build_index()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del traced
+    print(f"Built the index in {seconds:.1f} s: {size / 2**20:.0f} MiB, peak {peak / 2**20:.0f} MiB.")
+
+    # What a user types: the start of a full or comma name.
+    rng = random.Random(1)
+    names = [name[:rng.randint(1, len(name))] for name in rng.choices(comma_names + full_names, k=args.searches)]
+
+    with Session(engine) as session:
+        result = []
+        for name in names:
+            query = suggest_query(name)
+            start = time.perf_counter()
+            session.execute(query).all()
+            result.append(time.perf_counter() - start)
+        report('SQL', np.array(result) * 1000, 'searches')
+
+    result = []
+    for name in names:
+        start = time.perf_counter()
+        index.search(name, 10)
+        result.append(time.perf_counter() - start)
+    report('index', np.array(result) * 1000, 'searches')
+
+    engine.dispose()
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,5 +3,28 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     app_name: str = "FiMO API"
+    # Memory budget of the process-wide cache of player and rating rows.
+    rating_cache_mb: int = 64
+
+    database_path: str = "instance/database.db"
+    # Connections of the API are read-only and pooled, the ingest writes through its own connection.
+    read_pool_size: int = 8
+    # Per connection.
+    sqlite_mmap_mb: int = 256
+    sqlite_cache_mb: int = 32
+    sqlite_busy_timeout_ms: int = 5000
+    # Rows per transaction when the ingest writes a table.
+    write_chunk_size: int = 50_000
+    # Parsed chunks the streaming ingest keeps ready for inserting.
+    stream_queue_size: int = 2
+
+    download_cache_dir: str = "instance/cache"
+
+    # How long browsers and CDNs may use a GET response before revalidating it with its ETag.
+    http_max_age: int = 300
+    # Memory budget of the cache of serialized GET responses, 0 turns it off.
+    response_cache_mb: int = 0
+    # The player and rating endpoints encode row tuples with orjson, without the response models.
+    fast_json: bool = False
 
 settings = Settings()
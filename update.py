@@ -1,37 +1,99 @@
 import argparse
 import sqlite3
 
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from config import settings
+
+from app.database.applicable import refresh_applicable_rating
+from app.database.connection import connect_writer
 from app.database.fide.sql import (fill_fide_rating, refresh_fide_player,
                                    update_fide_rating)
 from app.database.knsb.sql import (fill_knsb_rating, refresh_knsb_player,
                                    update_knsb_rating)
+from app.database.meta import RatingPeriod, bump_generation
+from app.database.schema import create_schema
+from app.database.search import create_player_search
+from app.database.shadow import ShadowDatabaseError, shadow_database
+from app.database.suggest import refresh_suggest_player
+from app.rating.consistency import check_applicable_rating
 
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--fed', choices=['knsb', 'fide', 'all'], default='all')
-    parser.add_argument('--table', choices=['rating', 'player', 'all'], default='all')
-    parser.add_argument('--force', action='store_true')
-    args = parser.parse_args()
-
-    con = sqlite3.connect('instance/database.db')
-
+def update(con: sqlite3.Connection, args: argparse.Namespace) -> None:
     if args.fed in ('all', 'fide'):
         if args.table in ('all', 'rating'):
             print("Updating fide rating...")
-            update_fide_rating(con, args.force)
+            update_fide_rating(con, args.force, args.stream, args.offline)
         if args.table in ('all', 'player'):
             print("Updating fide player...")
-            refresh_fide_player(con, args.force)
+            refresh_fide_player(con, args.force, args.offline)
 
     if args.fed in ('all', 'knsb'):
         if args.table in ('all', 'rating'):
             print("Updating knsb rating...")
-            update_knsb_rating(con, args.force)
+            update_knsb_rating(con, args.force, args.stream, args.offline)
         if args.table in ('all', 'player'):
             print("Updating knsb player...")
-            refresh_knsb_player(con, args.force)
+            refresh_knsb_player(con, args.force, args.offline)
+
+    print("Updating applicable rating...")
+    if args.table in ('all', 'player'):
+        # The fed and fide_id of any player may have changed.
+        refresh_applicable_rating(con)
+    else:
+        refresh_applicable_rating(con, [RatingPeriod.current()])
+
+    # The player refreshes keep the search tables up to date, this creates them if only ratings were updated.
+    create_player_search(con)
+
+    # The suggestions carry the current ratings, so also after a rating update.
+    print("Updating suggest player...")
+    refresh_suggest_player(con)
+
+
+def check(con: sqlite3.Connection) -> list[str]:
+    engine = create_engine('sqlite://', creator=lambda: con, poolclass=StaticPool)
+    with Session(engine) as session:
+        mismatches = check_applicable_rating(session)
+    for mismatch in mismatches:
+        print(mismatch)
+    print(f"{len(mismatches)} mismatches in applicable_rating.")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fed', choices=['knsb', 'fide', 'all'], default='all')
+    parser.add_argument('--table', choices=['rating', 'player', 'all'], default='all')
+    parser.add_argument('--force', action='store_true')
+    parser.add_argument('--check', action='store_true',
+                        help="compare the applicable_rating table with the rating rules")
+    parser.add_argument('--shadow', action='store_true',
+                        help="build a complete new database and swap it in when it passes the checks")
+    parser.add_argument('--stream', action='store_true',
+                        help="insert the rating lists in chunks while they're parsed, with bounded memory")
+    parser.add_argument('--offline', action='store_true',
+                        help=f"only use the lists in the download cache ({settings.download_cache_dir})")
+    args = parser.parse_args()
+
+    if args.shadow:
+        with shadow_database() as con:
+            create_schema(con)
+            update(con, args)
+            if args.check and check(con):
+                raise ShadowDatabaseError("applicable_rating doesn't match the rating rules")
+        print("Done.")
+        return
+
+    con = connect_writer()
+    update(con, args)
+    if args.check:
+        check(con)
 
+    # Let the API workers know their cached rows are outdated.
+    bump_generation()
     print("Done.")
     
 if __name__ == '__main__':